@@ -0,0 +1,53 @@
+import os
+
+import pygame
+
+import config
+
+
+def image_names() -> list:
+    return sorted([file_name for file_name in os.listdir(config.IMG_FOLDER) if file_name.endswith('.png')])
+
+
+def atlas_file_name(tile_size: int) -> str:
+    # uncompressed, a bitmap loads faster than decoding the PNG files
+    return os.path.join(config.ATLAS_FOLDER, f'atlas_{tile_size}.bmp')
+
+
+def build_atlas(names: list, tile_size: int) -> pygame.Surface:
+    atlas = pygame.Surface((tile_size * len(names), tile_size))
+    for i, file_name in enumerate(names):
+        image = pygame.image.load(os.path.join(config.IMG_FOLDER, file_name))
+        atlas.blit(pygame.transform.scale(image, (tile_size, tile_size)), (i * tile_size, 0))
+    file_name = atlas_file_name(tile_size)
+    try:
+        os.makedirs(config.ATLAS_FOLDER, exist_ok=True)
+        pygame.image.save(atlas, file_name + '.tmp.bmp')
+        os.replace(file_name + '.tmp.bmp', file_name)
+    except (OSError, pygame.error):
+        # without a writable cache the atlas is built on every start
+        pass
+    return atlas
+
+
+def load_atlas(tile_size: int) -> dict:
+    """
+    Return the images of the img folder scaled to the tile size, as parts of one atlas image. The atlas is cached on
+        disk per tile size and built again when an image is newer than it.
+
+    :return: dict of image file name -> surface of the tile size
+    :param tile_size: size of the tiles in pixels
+    """
+    names = image_names()
+    file_name = atlas_file_name(tile_size)
+    newest_image = max([os.path.getmtime(os.path.join(config.IMG_FOLDER, name)) for name in names])
+    atlas = None
+    if os.path.exists(file_name) and os.path.getmtime(file_name) >= newest_image:
+        atlas = pygame.image.load(file_name)
+        if atlas.get_size() != (tile_size * len(names), tile_size):
+            # images were added or removed
+            atlas = None
+    if atlas is None:
+        atlas = build_atlas(names, tile_size)
+    atlas = atlas.convert()
+    return {name: atlas.subsurface((i * tile_size, 0, tile_size, tile_size)) for i, name in enumerate(names)}
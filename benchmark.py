@@ -0,0 +1,90 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from distance_field import cost_array, dijkstra_field, distance_field
+from parallel_search import parallel_distance_field
+from profiles import cost_grid, min_cost
+from search import weighted_a_star
+from synthetic import generate_map
+
+
+def path_cost(grid, path):
+    return sum([grid.cost(row, col) for row, col in path])
+
+
+def benchmark_epsilon(size, seeds, epsilons):
+    # Bole's weighted A* on the same synthetic maps for every epsilon, the cost is relative to epsilon = 0
+    road_cost = min_cost()
+    print(f'{"epsilon":>8} {"expansions":>11} {"cost":>9} {"excess":>8} {"bound":>7} {"time [s]":>9}')
+    optimal_costs = {}
+    for epsilon in epsilons:
+        expansions = cost = excess = bound = duration = 0
+        for seed in range(seeds):
+            char_map, start, goal = generate_map(size, size, seed)
+            grid = cost_grid(char_map)
+            begin = time.perf_counter()
+            path, stats = weighted_a_star(grid, start, goal, road_cost, epsilon)
+            duration += time.perf_counter() - begin
+            if seed not in optimal_costs:
+                optimal_costs[seed] = path_cost(grid, weighted_a_star(grid, start, goal, road_cost, 0)[0])
+            expansions += stats['expansions']
+            cost += path_cost(grid, path)
+            excess = max(excess, path_cost(grid, path) / optimal_costs[seed] - 1)
+            bound = max(bound, stats['bound'])
+        print(f'{epsilon:>8} {expansions // seeds:>11} {cost // seeds:>9} {excess:>8.2%} {bound:>7.3f} '
+              f'{duration / seeds:>9.3f}')
+
+
+def benchmark_parallel(size, seed, workers_counts):
+    """
+    Time the parallel distance field for every number of workers, against a sequential heapq Dijkstra over the whole
+        map (the speed-up) and the serial distance field. With more workers than cores, the workers only take turns,
+        so any speed-up comes from the smaller bands needing fewer sweeps, not from the extra cores.
+    """
+    char_map, start, goal = generate_map(size, size, seed)
+    costs = cost_array(cost_grid(char_map))
+    begin = time.perf_counter()
+    distances = dijkstra_field(costs, start)
+    dijkstra_duration = time.perf_counter() - begin
+    begin = time.perf_counter()
+    serial_distances = distance_field(costs, start)[0]
+    serial_duration = time.perf_counter() - begin
+    if not np.array_equal(distances, serial_distances):
+        raise SystemExit('ERR: Serial distance field differs from Dijkstra!')
+    print(f'{os.cpu_count()} CPU core(s); sequential Dijkstra: {dijkstra_duration:.3f} s, '
+          f'serial distance field: {serial_duration:.3f} s, cost {distances[goal]}')
+    print(f'{"workers":>8} {"rounds":>7} {"time [s]":>9} {"speed-up":>9} {"vs serial":>10} {"cost":>9}')
+    for workers in workers_counts:
+        begin = time.perf_counter()
+        parallel_distances, _, stats = parallel_distance_field(costs, start, workers)
+        duration = time.perf_counter() - begin
+        if not np.array_equal(distances, parallel_distances):
+            raise SystemExit(f'ERR: Parallel distance field with {workers} workers differs from Dijkstra!')
+        print(f'{stats["workers"]:>8} {stats["rounds"]:>7} {duration:>9.3f} {dijkstra_duration / duration:>9.2f} '
+              f'{serial_duration / duration:>10.2f} {parallel_distances[goal]:>9}')
+    if max(workers_counts) > os.cpu_count():
+        print(f'With {os.cpu_count()} CPU core(s), the workers above it only take turns - their speed-up over '
+              f'Dijkstra comes from the algorithm, not from the cores.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of the search algorithms on synthetic maps.')
+    benchmarks = parser.add_subparsers(dest='benchmark', required=True)
+    epsilon_parser = benchmarks.add_parser('epsilon', help='expansions and path cost of Bole across epsilons')
+    epsilon_parser.add_argument('--size', type=int, default=300, help='number of rows and columns of the maps')
+    epsilon_parser.add_argument('--seeds', type=int, default=3, help='number of maps')
+    epsilon_parser.add_argument('--epsilons', default='0,0.02,0.05,0.1,0.25,0.5,1',
+                                help='comma separated epsilons')
+    parallel_parser = benchmarks.add_parser('parallel', help='speed-up of the parallel search across core counts')
+    parallel_parser.add_argument('--size', type=int, default=2000, help='number of rows and columns of the map')
+    parallel_parser.add_argument('--seed', type=int, default=0)
+    parallel_parser.add_argument('--workers', default=f'1,2,4,8,16,{os.cpu_count()}',
+                                 help='comma separated numbers of worker processes')
+    args = parser.parse_args()
+    if args.benchmark == 'epsilon':
+        benchmark_epsilon(args.size, args.seeds, [float(epsilon) for epsilon in args.epsilons.split(',')])
+    elif args.benchmark == 'parallel':
+        benchmark_parallel(args.size, args.seed, sorted(set([int(workers) for workers in args.workers.split(',')])))
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import signal
+import struct
+import threading
+import time
+import zlib
+from array import array
+
+import config
+from profiles import cost_grid
+
+MAGIC = b'FTTCKPT1'
+
+
+def search_fingerprint(agent_name: str, game_map: list, start: tuple, goal: tuple) -> str:
+    # a checkpoint can only be resumed by the same agent, on the same costs, between the same fields
+    key = repr((agent_name, cost_grid(game_map).costs, tuple(start), tuple(goal)))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def write_state(file_name: str, state: dict):
+    """
+    Write the search state atomically - to a temporary file, renamed over the old checkpoint only when complete, so
+        a crash while writing leaves the previous checkpoint intact.
+
+    :param file_name: checkpoint file
+    :param state: dict of name -> list of tuples of ints of the same length (the frontier, the father-son
+        relations...), counters are lists with one tuple
+    """
+    with open(file_name + '.tmp', 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(state)))
+        for name, rows in state.items():
+            width = len(rows[0]) if rows else 0
+            data = zlib.compress(array('q', [value for row in rows for value in row]).tobytes(), 1)
+            f.write(struct.pack('<H', len(name)) + name.encode())
+            f.write(struct.pack('<QIQ', len(rows), width, len(data)))
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(file_name + '.tmp', file_name)
+
+
+def read_state(file_name: str) -> dict:
+    with open(file_name, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'ERR: {file_name} is not a checkpoint!')
+        state = dict()
+        for _ in range(struct.unpack('<I', f.read(4))[0]):
+            name = f.read(struct.unpack('<H', f.read(2))[0]).decode()
+            count, width, size = struct.unpack('<QIQ', f.read(20))
+            values = array('q')
+            values.frombytes(zlib.decompress(f.read(size)))
+            state[name] = [tuple(values[i:i + width]) for i in range(0, count * width, width)] if width else []
+    return state
+
+
+class Checkpointer:
+    """
+    Saves the state of a long search every CHECKPOINT_INTERVAL seconds and on Ctrl-C, to a file named after the
+        search fingerprint in the checkpoint folder, and gives it back when the same search is started again.
+        The search asks due() once per expansion, when its state is consistent, and saves if it returns True.
+        Without the folder, checkpoints are off and the checkpointer does nothing.
+    """
+    def __init__(self, folder: str = None, fingerprint: str = None, interval: float = None):
+        self.file_name = None
+        if folder is not None:
+            os.makedirs(folder, exist_ok=True)
+            self.file_name = os.path.join(folder, f'{fingerprint}.ckpt')
+        self.interval = config.CHECKPOINT_INTERVAL if interval is None else interval
+        self.next_save = time.monotonic() + self.interval
+        self.interrupted = False
+        self.previous_handler = None
+
+    def __enter__(self):
+        # Ctrl-C only marks the interruption, the state is saved at the next consistent point
+        if self.file_name is not None and threading.current_thread() is threading.main_thread():
+            self.previous_handler = signal.signal(signal.SIGINT, self.interrupt)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if self.previous_handler is not None:
+            signal.signal(signal.SIGINT, self.previous_handler)
+        if exc_type is None and self.file_name is not None and os.path.exists(self.file_name):
+            # the search finished, there is nothing to resume
+            os.remove(self.file_name)
+
+    def interrupt(self, signal_number, frame):
+        self.interrupted = True
+
+    def load(self):
+        if self.file_name is None or not os.path.exists(self.file_name):
+            return None
+        return read_state(self.file_name)
+
+    def due(self) -> bool:
+        return self.file_name is not None and (self.interrupted or time.monotonic() >= self.next_save)
+
+    def save(self, state: dict):
+        write_state(self.file_name, state)
+        self.next_save = time.monotonic() + self.interval
+        if self.interrupted:
+            raise KeyboardInterrupt(f'Search interrupted, resume it from {self.file_name}')
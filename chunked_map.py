@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import random
+from collections import OrderedDict
+
+import config
+from grid import Grid
+from profiles import min_cost, terrain_costs
+from search import memory_bounded_search, weighted_a_star
+from synthetic import TERRAIN_WEIGHTS
+
+
+class ChunkedGrid(Grid):
+    """
+    Map stored on disk in square chunks of field kinds (one byte per field), paged in on demand and kept in an LRU
+        cache that holds at most memory_budget bytes of chunks. Chunks that were never written are filled with the
+        default kind, so sparse worlds take space only for the chunks that differ from it. Costs of the kinds come
+        from the cost profile.
+    """
+    def __init__(self, folder: str, memory_budget: int = config.CHUNK_MEMORY_BUDGET, profile: str = None):
+        with open(os.path.join(folder, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        self.folder = folder
+        self.rows = meta['rows']
+        self.cols = meta['cols']
+        self.chunk_size = meta['chunk_size']
+        self.default_kind = meta['default_kind']
+        self.max_chunks = max(1, memory_budget // (self.chunk_size * self.chunk_size))
+        self.chunks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.last_key = None
+        self.last_chunk = None
+        self.kind_costs = None
+        self.use_profile(profile)
+
+    def use_profile(self, profile: str = None):
+        # cost of each field kind by its byte, unknown kinds cost as grass
+        costs = terrain_costs(profile)
+        self.kind_costs = [costs.get(chr(kind), costs['g']) for kind in range(256)]
+
+    @staticmethod
+    def create(folder: str, rows: int, cols: int, chunk_size: int, default_kind: str = 'g'):
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, 'meta.json'), 'w') as f:
+            json.dump({'rows': rows, 'cols': cols, 'chunk_size': chunk_size, 'default_kind': default_kind}, f)
+        return ChunkedGrid(folder)
+
+    @staticmethod
+    def from_char_map(folder: str, char_map: list, chunk_size: int):
+        grid = ChunkedGrid.create(folder, len(char_map), len(char_map[0]), chunk_size)
+        for chunk_row in range(0, grid.rows, chunk_size):
+            for chunk_col in range(0, grid.cols, chunk_size):
+                grid.write_chunk(chunk_row // chunk_size, chunk_col // chunk_size,
+                                 [row[chunk_col:chunk_col + chunk_size]
+                                  for row in char_map[chunk_row:chunk_row + chunk_size]])
+        return grid
+
+    def chunk_file_name(self, chunk_row, chunk_col):
+        return os.path.join(self.folder, f'{chunk_row}_{chunk_col}.chunk')
+
+    def write_chunk(self, chunk_row: int, chunk_col: int, kinds: list):
+        """
+        Write the field kinds of the chunk, as a list of rows (strings or lists of kinds). Rows and columns missing
+            at the edges of the chunk are filled with the default kind.
+        """
+        size = self.chunk_size
+        data = bytearray(self.default_kind.encode() * size * size)
+        for i, row in enumerate(kinds):
+            data[i * size:i * size + len(row)] = ''.join(row).encode()
+        file_name = self.chunk_file_name(chunk_row, chunk_col)
+        with open(file_name + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(file_name + '.tmp', file_name)
+        self.chunks.pop((chunk_row, chunk_col), None)
+        self.last_key = None
+
+    def load_chunk(self, key):
+        file_name = self.chunk_file_name(*key)
+        if os.path.exists(file_name):
+            with open(file_name, 'rb') as f:
+                return f.read()
+        return self.default_kind.encode() * (self.chunk_size * self.chunk_size)
+
+    def cost(self, row, col):
+        size = self.chunk_size
+        key = (row // size, col // size)
+        if key == self.last_key:
+            # the search mostly stays in the same chunk, skip the cache bookkeeping
+            self.hits += 1
+            return self.kind_costs[self.last_chunk[(row % size) * size + col % size]]
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            self.misses += 1
+            chunk = self.load_chunk(key)
+            self.chunks[key] = chunk
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.hits += 1
+            self.chunks.move_to_end(key)
+        self.last_key = key
+        self.last_chunk = chunk
+        return self.kind_costs[chunk[(row % size) * size + col % size]]
+
+    def stats(self):
+        return {'chunk_hits': self.hits, 'chunk_misses': self.misses, 'chunks_in_memory': len(self.chunks),
+                'max_chunks': self.max_chunks}
+
+
+def create_sparse_world(folder, size, chunk_size, seed, density):
+    # grass world where a density share of the chunks is filled with random terrain
+    grid = ChunkedGrid.create(folder, size, size, chunk_size)
+    generator = random.Random(seed)
+    chunks_per_side = (size + chunk_size - 1) // chunk_size
+    kinds = list(TERRAIN_WEIGHTS)
+    weights = list(TERRAIN_WEIGHTS.values())
+    for _ in range(int(chunks_per_side * chunks_per_side * density)):
+        grid.write_chunk(generator.randrange(chunks_per_side), generator.randrange(chunks_per_side),
+                         [generator.choices(kinds, weights, k=chunk_size) for _ in range(chunk_size)])
+    return grid
+
+
+def field(text):
+    return tuple(int(val) for val in text.split(','))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maps stored on disk in chunks.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help='store a map file in chunks')
+    import_parser.add_argument('map', help='map file')
+    import_parser.add_argument('folder', help='folder for the chunks')
+    import_parser.add_argument('--chunk-size', type=int, default=256)
+    sparse_parser = commands.add_parser('sparse', help='create a sparse random world')
+    sparse_parser.add_argument('folder', help='folder for the chunks')
+    sparse_parser.add_argument('--size', type=int, default=100000, help='number of rows and columns')
+    sparse_parser.add_argument('--chunk-size', type=int, default=256)
+    sparse_parser.add_argument('--density', type=float, default=0.001, help='share of the non-default chunks')
+    sparse_parser.add_argument('--seed', type=int, default=0)
+    solve_parser = commands.add_parser('solve', help='find the cheapest path on the chunked map')
+    solve_parser.add_argument('folder', help='folder with the chunks')
+    solve_parser.add_argument('start', type=field, help='row,col')
+    solve_parser.add_argument('goal', type=field, help='row,col')
+    solve_parser.add_argument('--memory-budget', type=int, default=config.CHUNK_MEMORY_BUDGET,
+                              help='bytes of chunks kept in memory')
+    solve_parser.add_argument('--cost-profile', default=config.COST_PROFILE, help='cost profile')
+    solve_mode = solve_parser.add_mutually_exclusive_group()
+    solve_mode.add_argument('--epsilon', type=float, default=0, help='bounded suboptimal search (weighted A*)')
+    solve_mode.add_argument('--memory-limit', type=int, default=None,
+                            help='memory bounded search (divide and conquer frontier search)')
+    args = parser.parse_args()
+    if args.command == 'solve' and args.epsilon < 0:
+        solve_parser.error('--epsilon must not be negative')
+
+    if args.command == 'import':
+        from game import Game
+        ChunkedGrid.from_char_map(args.folder, Game.load_map(args.map)[0], args.chunk_size)
+    elif args.command == 'sparse':
+        create_sparse_world(args.folder, args.size, args.chunk_size, args.seed, args.density)
+    else:
+        config.COST_PROFILE = args.cost_profile
+        chunked_grid = ChunkedGrid(args.folder, args.memory_budget)
+        road_cost = min_cost()
+        if args.memory_limit is not None:
+            path, stats = memory_bounded_search(chunked_grid, args.start, args.goal, road_cost, args.memory_limit)
+        else:
+            path, stats = weighted_a_star(chunked_grid, args.start, args.goal, road_cost, args.epsilon)
+        print(f'Path length: {len(path)}')
+        print(f'Path cost: {sum([chunked_grid.cost(row, col) for row, col in path])}')
+        print(f"Search stats: {', '.join([f'{name}={value}' for name, value in stats.items()])}")
+        print(f"Chunk stats: {', '.join([f'{name}={value}' for name, value in chunked_grid.stats().items()])}")
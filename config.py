@@ -6,9 +6,25 @@ MAX_WIDTH = 1300
 WIDTH = None
 HEIGHT = None
 TILE_SIZE = None
-GAME_SPEED = None
+FPS = 60
+STEP_DURATION = 500  # milliseconds per step at 1x speed
+PLAYBACK_SPEEDS = [1, 10, 100, None]  # selected with keys 1-4, None - instant
 GAME_FONT = None
 RIBBON_HEIGHT = None
+MEMORY_LIMIT = None  # maximal number of search entries of the optimal agents, None - unbounded
+EPSILON = None  # Bole's path may cost at most (1 + EPSILON) times the cheapest one, None - the original A*
+CHUNK_MEMORY_BUDGET = 64 * 1024 * 1024  # bytes of chunks of a chunked map kept in memory
+COST_PROFILE = 'default'  # active cost profile from the PROFILES_FILE
+PROFILE = None  # profiler of the search - 'cprofile', 'sampling' or None
+SAMPLING_INTERVAL = 0.005  # seconds between the stack samples of the sampling profiler
+CHECKPOINT_FOLDER = None  # folder for the checkpoints of Aki's and Draza's searches, None - no checkpoints
+CHECKPOINT_INTERVAL = 60  # seconds between the checkpoints
+OUTPUT_FORMAT = 'text'  # format of the printed path - text, rle, binary or stream (see path_output.py)
+OUTPUT_FILE = None  # file for the path, None - the standard output
+AKI_EXPANSION_BUDGET = None  # maximal number of Aki's expansions, None - unlimited
+AKI_TIME_BUDGET = None  # maximal seconds of Aki's search, None - unlimited
+AKI_TRANSPOSITION = None  # Aki skips the fields expanded before - 'visited' always, 'cost' unless reached cheaper
+STARTUP_BEGIN = None  # time.perf_counter() at the start of main.py, when the startup time is reported
 
 # define colors
 WHITE = (255, 255, 255)
@@ -19,4 +35,11 @@ DARK_GREEN = (0, 128, 0)
 
 GAME_FOLDER = os.path.dirname(__file__)
 IMG_FOLDER = os.path.join(GAME_FOLDER, 'img')
+ATLAS_FOLDER = os.path.join(GAME_FOLDER, 'cache')
 MAP_FOLDER = os.path.join(GAME_FOLDER, 'maps')
+PROFILES_FILE = os.path.join(GAME_FOLDER, 'profiles.json')
+SOLUTIONS_FOLDER = os.path.join(GAME_FOLDER, 'solutions')
+PROFILE_FOLDER = os.path.join(GAME_FOLDER, 'reports')
+DEFAULT_CHECKPOINT_FOLDER = os.path.join(GAME_FOLDER, 'checkpoints')
+REGRESSION_FILE = os.path.join(GAME_FOLDER, 'regression.json')
+SERVER_PORT = 8765
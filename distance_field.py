@@ -0,0 +1,219 @@
+import glob
+import heapq
+import os
+import time
+
+import numpy as np
+
+import config
+from grid import Grid, CostGrid
+from profiles import cost_grid
+
+UNREACHABLE = np.iinfo(np.int64).max // 4
+# side of the square blocks the distances are relaxed in
+BLOCK_SIZE = 64
+
+
+def cost_array(grid: Grid) -> np.ndarray:
+    if isinstance(grid, CostGrid):
+        return np.array(grid.costs, dtype=np.int64)
+    return np.array([[grid.cost(row, col) for col in range(grid.cols)] for row in range(grid.rows)], dtype=np.int64)
+
+
+def distance_field(costs: np.ndarray, start: tuple) -> tuple:
+    """
+    Return the cost of the cheapest path from the start to every field of the map, relaxed block by block (see relax).
+
+    :return: Tuple (distances, fathers) - arrays of the map size with the path cost to each field (including the
+        start and the field itself, as the game counts it) and the flat index (row * columns + col) of the previous
+        field on the path, -1 for the start and the unreachable fields
+    :param costs: array of the field costs
+    :param start: (row, col) of the start field
+    """
+    distances = np.full(costs.shape, UNREACHABLE, dtype=np.int64)
+    distances[start] = costs[start]
+    relax(distances, costs)
+    return distances, distance_fathers(costs, distances)
+
+
+def prefix_sweeps(costs: np.ndarray) -> list:
+    # along a line, the cost to the field c is min over k <= c of distance[k] + costs[k + 1..c], which is
+    # prefix_cost[c] + min over k <= c of (distance[k] - prefix_cost[k]) - so each sweep is a running minimum
+    sweeps = []
+    for axis in (0, 1):
+        for backwards in (False, True):
+            sweeps.append((axis, backwards, np.cumsum(np.flip(costs, axis) if backwards else costs, axis=axis)))
+    return sweeps
+
+
+def sweep(distances: np.ndarray, sweeps: list) -> bool:
+    """
+    Sweep the distances in place down, up, right and left, until a round of sweeps changes nothing. A sweep carries
+        the costs along straight stretches of the paths, so the rounds grow with the turns of the paths - sweeping
+        small blocks keeps them few.
+
+    :return: True if any distance was lowered
+    :param distances: array of the path costs found so far, UNREACHABLE where no path is known
+    :param sweeps: prefix_sweeps of the field costs of the same shape
+    """
+    candidates = np.empty_like(distances)
+    changed = False
+    while True:
+        previous_distances = distances.copy()
+        for axis, backwards, prefix_costs in sweeps:
+            # flipped view, so the sweep writes straight into the distances
+            line_distances = np.flip(distances, axis) if backwards else distances
+            np.subtract(line_distances, prefix_costs, out=candidates)
+            np.minimum.accumulate(candidates, axis=axis, out=candidates)
+            candidates += prefix_costs
+            np.minimum(line_distances, candidates, out=line_distances)
+        if np.array_equal(previous_distances, distances):
+            return changed
+        changed = True
+
+
+def relax(distances: np.ndarray, costs: np.ndarray, block_size: int = BLOCK_SIZE) -> bool:
+    """
+    Lower the distances in place to the cheapest path costs through the known ones. The map is split in square
+        blocks, relaxed as the fields of Dijkstra's algorithm - the block with the lowest distance on its edge first.
+        A block is swept with the row and column around it until nothing changes, and a neighbouring block is
+        relaxed again only when the edge next to it was lowered, so every block is swept a few times, however big
+        the map and winding the paths are.
+
+    :return: True if any distance was lowered
+    :param distances: array of the path costs found so far, UNREACHABLE where no path is known
+    :param costs: array of the field costs of the same shape
+    :param block_size: side of the blocks
+    """
+    rows, cols = distances.shape
+    # (lowest distance, block row, block col), with the outdated entries skipped
+    queue = []
+    queued = dict()
+    for block_row in range(0, rows, block_size):
+        for block_col in range(0, cols, block_size):
+            lowest = int(distances[max(block_row - 1, 0):block_row + block_size + 1,
+                                   max(block_col - 1, 0):block_col + block_size + 1].min())
+            if lowest < UNREACHABLE:
+                queued[(block_row, block_col)] = lowest
+                queue.append((lowest, block_row, block_col))
+    heapq.heapify(queue)
+    # prefix sums of the blocks with the fields around them, computed once per relaxation
+    block_sweeps = dict()
+    changed = False
+
+    while queue:
+        lowest, top, left = heapq.heappop(queue)
+        if queued.get((top, left)) != lowest:
+            continue
+        del queued[(top, left)]
+        bottom, right = min(top + block_size, rows), min(left + block_size, cols)
+        window_top, window_left = max(top - 1, 0), max(left - 1, 0)
+        window = np.s_[window_top:min(bottom + 1, rows), window_left:min(right + 1, cols)]
+        if (top, left) not in block_sweeps:
+            block_sweeps[(top, left)] = prefix_sweeps(costs[window])
+        window_distances = distances[window].copy()
+        if not sweep(window_distances, block_sweeps[(top, left)]):
+            continue
+        # only the block is written, the fields around it belong to the neighbours
+        block = distances[top:bottom, left:right]
+        swept = window_distances[top - window_top:bottom - window_top, left - window_left:right - window_left]
+        lowered = swept < block
+        if not lowered.any():
+            continue
+        block[lowered] = swept[lowered]
+        changed = True
+        # the lowered edges of the block, and the neighbours next to them
+        for edge, neighbour in [(np.s_[0, :], (top - block_size, left)), (np.s_[:, -1], (top, left + block_size)),
+                                (np.s_[-1, :], (top + block_size, left)), (np.s_[:, 0], (top, left - block_size))]:
+            if not (0 <= neighbour[0] < rows and 0 <= neighbour[1] < cols) or not lowered[edge].any():
+                continue
+            edge_lowest = int(block[edge][lowered[edge]].min())
+            if edge_lowest < queued.get(neighbour, UNREACHABLE):
+                queued[neighbour] = edge_lowest
+                heapq.heappush(queue, (edge_lowest, neighbour[0], neighbour[1]))
+    return changed
+
+
+def dijkstra_field(costs: np.ndarray, start: tuple) -> np.ndarray:
+    # plain Dijkstra over all the fields - the reference the distance field is checked and timed against
+    rows, cols = costs.shape
+    field_costs = costs.ravel().tolist()
+    distances = [int(UNREACHABLE)] * (rows * cols)
+    start_index = start[0] * cols + start[1]
+    distances[start_index] = field_costs[start_index]
+    queue = [(distances[start_index], start_index)]
+    while queue:
+        distance, index = heapq.heappop(queue)
+        if distance > distances[index]:
+            continue
+        row, col = divmod(index, cols)
+        for neighbour, inside in ((index - cols, row > 0), (index + 1, col < cols - 1),
+                                  (index + cols, row < rows - 1), (index - 1, col > 0)):
+            if inside and distance + field_costs[neighbour] < distances[neighbour]:
+                distances[neighbour] = distance + field_costs[neighbour]
+                heapq.heappush(queue, (distances[neighbour], neighbour))
+    return np.array(distances, dtype=np.int64).reshape(rows, cols)
+
+
+def distance_fathers(costs: np.ndarray, distances: np.ndarray) -> np.ndarray:
+    # the father of a field is the neighbour its cheapest path comes from, north-east-south-west if there are more
+    rows, cols = costs.shape
+    indexes = np.arange(rows * cols, dtype=np.int64).reshape(rows, cols)
+    fathers = np.full((rows, cols), -1, dtype=np.int64)
+    # (fields, their neighbours in the direction) for the north, east, south and west
+    for fields, neighbours in [(np.s_[1:, :], np.s_[:-1, :]), (np.s_[:, :-1], np.s_[:, 1:]),
+                               (np.s_[:-1, :], np.s_[1:, :]), (np.s_[:, 1:], np.s_[:, :-1])]:
+        found = (fathers[fields] == -1) & (distances[neighbours] + costs[fields] == distances[fields])
+        fathers[fields] = np.where(found, indexes[neighbours], fathers[fields])
+    return fathers
+
+
+def path_to(fathers: np.ndarray, goal: tuple) -> list:
+    """
+    Return the list of (row, col) from the start to the goal, following the fathers of the distance field.
+    """
+    cols = fathers.shape[1]
+    path = [tuple(goal)]
+    index = fathers[goal]
+    while index != -1:
+        path.append((int(index // cols), int(index % cols)))
+        index = fathers[path[-1]]
+    path.reverse()
+    return path
+
+
+if __name__ == '__main__':
+    # cross-check with Draza's cheapest paths on all maps, and with Dijkstra's distances and time on synthetic maps
+    from render import init_headless
+    init_headless()
+    from game import Game
+    from profiles import terrain_costs
+    from synthetic import generate_map
+
+    for map_name in sorted(glob.glob(os.path.join(config.MAP_FOLDER, '*.txt'))):
+        g = Game(map_name, 'Draza', headless=True)
+        draza_cost = sum([tile.cost() for tile in g.agent.get_agent_path(g.tile_map, g.goal)])
+        field_distances, field_fathers = distance_field(cost_array(cost_grid(g.tile_map)), tuple(g.start))
+        goal_field = tuple(g.goal)
+        field_cost = field_distances[goal_field]
+        path_cost = sum([g.tile_map[row][col].cost() for row, col in path_to(field_fathers, goal_field)])
+        status = 'OK' if draza_cost == field_cost == path_cost else 'MISMATCH'
+        print(f'{os.path.basename(map_name)}: Draza {draza_cost}, distance field {field_cost} - {status}')
+        if status != 'OK':
+            raise SystemExit(1)
+
+    kind_costs = terrain_costs()
+    for size in (100, 300, 1000):
+        char_map, start_field, _ = generate_map(size, size, 0)
+        field_costs = np.array([[kind_costs[kind] for kind in row] for row in char_map], dtype=np.int64)
+        begin = time.perf_counter()
+        field_distances = distance_field(field_costs, tuple(start_field))[0]
+        field_time = time.perf_counter() - begin
+        begin = time.perf_counter()
+        dijkstra_distances = dijkstra_field(field_costs, tuple(start_field))
+        dijkstra_time = time.perf_counter() - begin
+        status = 'OK' if np.array_equal(field_distances, dijkstra_distances) else 'MISMATCH'
+        print(f'synthetic {size}x{size}: distance field {field_time:.3f} s, Dijkstra {dijkstra_time:.3f} s '
+              f'(speed-up {dijkstra_time / field_time:.2f}x) - {status}')
+        if status != 'OK':
+            raise SystemExit(1)
@@ -1,7 +1,8 @@
 import os
-import sys
+import time
 import pygame
 import config
+from path_output import write_path
 from sprites import Stone, Grass, Dune, Water, Road, Mud, Goal, Trail
 
 
@@ -10,24 +11,34 @@ class EndGame(Exception):
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, map_name=os.path.join(config.MAP_FOLDER, 'map0.txt'), agent_name='ExampleAgent', headless=False):
         self.path_cost = 0
-        pygame.display.set_caption('PyTanja')
-        values = Game.load_map(sys.argv[1] if len(sys.argv) > 1 else os.path.join(config.MAP_FOLDER, 'map0.txt'))
+        values = Game.load_map(map_name)
         self.char_map = values[0]
         self.start = values[1:3]
         self.goal = values[3:]
+        self.map_id = os.path.splitext(os.path.basename(map_name))[0]
+        self.agent_name = agent_name
+        # the goal from the second line and every field marked with x are treasures, all of them are collected
+        self.goals = [self.goal] + [(i, j) for i, row in enumerate(self.char_map) for j, el in enumerate(row)
+                                    if el == 'x' and (i, j) != self.goal]
         # window scaling
         config.TILE_SIZE = min(config.MAX_HEIGHT // len(self.char_map), config.MAX_WIDTH // len(self.char_map[0]))
         config.HEIGHT = config.TILE_SIZE * len(self.char_map)
         config.WIDTH = config.TILE_SIZE * len(self.char_map[0])
-        config.GAME_SPEED = int(config.TILE_SIZE * 2)
         pygame.font.init()
         config.GAME_FONT = pygame.font.Font(None, config.TILE_SIZE // 3)
         config.RIBBON_HEIGHT = int(config.GAME_FONT.size('')[1] * 1.5)
-        self.screen = pygame.display.set_mode((config.WIDTH, config.HEIGHT + config.RIBBON_HEIGHT))
+        if headless:
+            # offscreen surface, the display only has to be initialized for the image conversion
+            self.screen = pygame.Surface((config.WIDTH, config.HEIGHT + config.RIBBON_HEIGHT))
+        else:
+            pygame.display.set_caption('PyTanja')
+            self.screen = pygame.display.set_mode((config.WIDTH, config.HEIGHT + config.RIBBON_HEIGHT))
         self.tiles_sprites = pygame.sprite.Group()
         self.trails_sprites = pygame.sprite.Group()
+        # (row, col) -> trail of the field
+        self.trails = dict()
         self.agents_sprites = pygame.sprite.Group()
         tile_map = []
         for i, row in enumerate(self.char_map):
@@ -51,16 +62,18 @@ class Game:
                 map_row.append(t)
             tile_map.append(map_row)
         self.tile_map = tile_map
-        self.tiles_sprites.add(Goal(self.goal[0], self.goal[1]))
+        for goal in self.goals:
+            self.tiles_sprites.add(Goal(goal[0], goal[1]))
         module = __import__('sprites')
-        class_ = getattr(module, sys.argv[2] if len(sys.argv) > 2 else 'ExampleAgent')
-        self.agent = class_(self.start[0], self.start[1],
-                            f'{sys.argv[2]}.png' if len(sys.argv) > 2 else 'ExampleAgent.png')
+        class_ = getattr(module, agent_name)
+        self.agent = class_(self.start[0], self.start[1], f'{agent_name}.png')
         self.agents_sprites.add(self.agent)
         self.clock = pygame.time.Clock()
         self.running = True
         self.playing = False
         self.game_over = False
+        self.redraw = True
+        self.speed = config.PLAYBACK_SPEEDS[0]
 
     @staticmethod
     def load_map(map_name):
@@ -78,6 +91,35 @@ class Game:
         except Exception as e:
             raise e
 
+    def get_path(self):
+        # the agent's path to the goal, or through all the treasures in the cheapest order, one agent's path each
+        if len(self.goals) == 1:
+            return self.agent.get_agent_path(self.tile_map, self.goal)
+        # NumPy is only needed for the treasure routing, the game starts faster without it
+        from distance_field import cost_array
+        from profiles import cost_grid
+        from routing import pairwise_costs, visit_order
+
+        costs = pairwise_costs(cost_array(cost_grid(self.tile_map)), [self.start] + self.goals)
+        path = []
+        # stats of the whole route - the counters of the legs add up, the peaks and bounds are the worst leg's
+        route_stats = {'legs': len(self.goals)}
+        for index in visit_order(costs):
+            goal = self.goals[index - 1]
+            leg = self.agent.get_agent_path(self.tile_map, goal)
+            path += leg[1:] if path else leg
+            self.agent.place_to(goal[0], goal[1])
+            for name, value in self.agent.stats.items():
+                if name.startswith('peak_') or name == 'bound':
+                    route_stats[name] = max(route_stats.get(name, value), value)
+                elif name in ('memory_limit', 'epsilon'):
+                    route_stats[name] = value
+                else:
+                    route_stats[name] = route_stats.get(name, 0) + value
+        self.agent.place_to(self.start[0], self.start[1])
+        self.agent.stats = route_stats
+        return path
+
     def check_move(self, old_x, old_y, x, y):
         if abs(old_x - x) + abs(old_y - y) != 1:
             raise Exception(f'ERR: Path nodes {old_x, old_y} and {x, y} are not adjacent!')
@@ -87,60 +129,97 @@ class Game:
 
     def run(self):
         # game loop - set self.playing = False to end the game
-        path = self.agent.get_agent_path(self.tile_map, self.goal)
-        orig_path = [p for p in path]
-        print(f"Path: {', '.join([str(p.position()) for p in path])}")
+        # the map is shown before the search, which may take a while
+        self.draw()
+        if config.STARTUP_BEGIN is not None:
+            print(f'Window shown after {(time.perf_counter() - config.STARTUP_BEGIN) * 1000:.0f} ms')
+        if config.PROFILE:
+            from profiling import profile_call
+
+            path = profile_call(self.get_path, f'{self.agent_name}_{self.map_id}', config.PROFILE == 'sampling')
+        else:
+            path = self.get_path()
+        # cost and length are computed once, for the output and the end of the game
+        total_cost = sum([t.cost() for t in path])
+        write_path([p.position() for p in path], config.OUTPUT_FORMAT, config.OUTPUT_FILE)
         print(f'Path length: {len(path)}')
-        print(f'Path cost: {sum([t.cost() for t in path])}')
-        tile = path.pop(0)
+        print(f'Path cost: {total_cost}')
+        if self.agent.stats:
+            print(f"Search stats: {', '.join([f'{name}={value}' for name, value in self.agent.stats.items()])}")
+        tile = path[0]
         x, y = tile.position()
         self.path_cost = tile.cost()
         step_count = 1
-        game_time = 0
+        step_index = 1
+        # time (in milliseconds at 1x speed) spent on the current step, the first step starts right away
+        step_time = config.STEP_DURATION
         while self.running:
             try:
                 if self.playing:
-                    if not game_time:
+                    if self.speed is None:
+                        raise EndGame()
+                    step_time += self.clock.tick(config.FPS) * self.speed
+                    # steps that were due during a slow frame are taken at once instead of slowing the playback
+                    while step_time >= config.STEP_DURATION:
+                        step_time -= config.STEP_DURATION
                         self.agent.place_to(x, y)
-                        self.trails_sprites.add(Trail(x, y, step_count))
+                        self.add_trail(x, y, step_count)
                         step_count += 1
-                        try:
-                            tile = path.pop(0)
-                        except IndexError:
+                        if step_index == len(path):
                             raise EndGame()
+                        tile = path[step_index]
+                        step_index += 1
                         old_x, old_y = x, y
                         x, y = tile.position()
                         self.check_move(old_x, old_y, x, y)
                         self.path_cost += tile.cost()
-                    game_time += 1
-                    if game_time == config.TILE_SIZE:
-                        game_time = 0
-                    self.agent.move_towards(x, y)
-                    self.clock.tick(config.GAME_SPEED)
+                    self.agent.move_towards(x, y, step_time / config.STEP_DURATION)
+                    self.redraw = True
+                if self.redraw:
+                    self.draw()
                 self.events()
-                self.draw()
             except EndGame:
                 self.game_over = True
                 self.playing = False
-                if len(orig_path):
-                    self.path_cost = sum([t.cost() for t in orig_path])
-                    goal_x, goal_y = orig_path[-1].position()
-                    self.trails_sprites = pygame.sprite.Group()
-                    for num, tile in enumerate(orig_path):
-                        old_x, old_y = x, y
-                        x, y = tile.position()
-                        if num:
-                            self.check_move(old_x, old_y, x, y)
-                        self.trails_sprites.add(Trail(x, y, num + 1))
-                    self.agent.place_to(goal_x, goal_y)
+                self.redraw = True
+                self.show_path(path, total_cost)
             except Exception as e:
                 self.game_over = True
                 raise e
 
+    def show_path(self, path, path_cost=None):
+        # final state of the game - the whole path is trailed and the agent stands on its last field
+        if len(path):
+            self.path_cost = sum([t.cost() for t in path]) if path_cost is None else path_cost
+            goal_x, goal_y = path[-1].position()
+            self.trails_sprites = pygame.sprite.Group()
+            self.trails = dict()
+            x, y = path[0].position()
+            for num, tile in enumerate(path):
+                old_x, old_y = x, y
+                x, y = tile.position()
+                if num:
+                    self.check_move(old_x, old_y, x, y)
+                self.add_trail(x, y, num + 1)
+            self.agent.place_to(goal_x, goal_y)
+
+    def add_trail(self, row, col, step):
+        # a field the path comes back to keeps its trail, with the number of this step added
+        if (row, col) in self.trails:
+            self.trails[(row, col)].add_step(step)
+        else:
+            self.trails[(row, col)] = Trail(row, col, step)
+            self.trails_sprites.add(self.trails[(row, col)])
+
     def quit(self):
         self.running = False
 
     def draw(self):
+        self.render()
+        pygame.display.flip()
+        self.redraw = False
+
+    def render(self):
         self.screen.fill(config.BLACK, rect=(0, config.HEIGHT, config.WIDTH, config.RIBBON_HEIGHT))
         self.tiles_sprites.draw(self.screen)
         self.trails_sprites.draw(self.screen)
@@ -149,20 +228,31 @@ class Game:
         self.agents_sprites.draw(self.screen)
         cost = config.GAME_FONT.render(f'Score: {str(self.path_cost)}', True, config.GREEN)
         self.screen.blit(cost, (10, config.HEIGHT + config.RIBBON_HEIGHT // 5))
+        speed = config.GAME_FONT.render(f'Speed: {f"{self.speed}x" if self.speed else "instant"}', True, config.GREEN)
+        self.screen.blit(speed, speed.get_rect(topright=(config.WIDTH - 10, config.HEIGHT + config.RIBBON_HEIGHT // 5)))
         if self.game_over:
             game_over = config.GAME_FONT.render('GAME OVER', True, config.RED)
             text_rect = game_over.get_rect(center=(config.WIDTH // 2, config.HEIGHT // 2))
             self.screen.blit(game_over, text_rect)
-        pygame.display.flip()
 
     def events(self):
-        # catch all events here
-        for event in pygame.event.get():
+        # catch all events here - while nothing is animating, block until the next event arrives
+        events = pygame.event.get() if self.playing else [pygame.event.wait()] + pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 self.quit()
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+                self.redraw = True
             if self.game_over:
-                return
+                continue
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                 self.playing = not self.playing
+                self.redraw = True
+                if self.playing:
+                    # the time spent paused must not count towards the playback
+                    self.clock.tick()
+            elif event.type == pygame.KEYDOWN and pygame.K_1 <= event.key < pygame.K_1 + len(config.PLAYBACK_SPEEDS):
+                self.speed = config.PLAYBACK_SPEEDS[event.key - pygame.K_1]
+                self.redraw = True
             elif event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
                 raise EndGame()
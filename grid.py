@@ -0,0 +1,41 @@
+class Grid:
+    """
+    Map as seen by the search algorithms - its size and the cost of entering each field.
+    """
+    rows = 0
+    cols = 0
+
+    def cost(self, row: int, col: int) -> int:
+        """
+        Return the cost of the field (row, col).
+        """
+        raise NotImplementedError
+
+    def neighbours(self, row: int, col: int) -> list:
+        """
+        Return the neighbours of the field (row, col) as (row, col, direction) in north-east-south-west order.
+        Directions are numbered the same way as in the agents: north 4, east 3, south 2 and west 1.
+        """
+        neighbours = []
+        if row > 0:
+            neighbours.append((row - 1, col, 4))
+        if col < self.cols - 1:
+            neighbours.append((row, col + 1, 3))
+        if row < self.rows - 1:
+            neighbours.append((row + 1, col, 2))
+        if col > 0:
+            neighbours.append((row, col - 1, 1))
+        return neighbours
+
+
+class CostGrid(Grid):
+    """
+    Field costs precomputed as a list of rows.
+    """
+    def __init__(self, costs: list):
+        self.costs = costs
+        self.rows = len(costs)
+        self.cols = len(costs[0])
+
+    def cost(self, row, col):
+        return self.costs[row][col]
@@ -1,12 +1,64 @@
+import time
+startup_begin = time.perf_counter()
+
+import argparse
+import os
 import traceback
 import pygame
 
+import config
+
 from game import Game
+from path_output import FORMATS
+from search import SearchBudgetExceeded
+
+parser = argparse.ArgumentParser(description='Find the treasure on the map with one of the agents.')
+parser.add_argument('map', nargs='?', default=os.path.join(config.MAP_FOLDER, 'map0.txt'), help='map file')
+parser.add_argument('agent', nargs='?', default='ExampleAgent', help='agent name (Aki, Jocke, Draza, Bole)')
+search_mode = parser.add_mutually_exclusive_group()
+search_mode.add_argument('--memory-limit', type=int, default=None,
+                         help='search Draza and Bole keeping at most this many search entries')
+search_mode.add_argument('--epsilon', type=float, default=None,
+                         help='let Bole return a path costing at most (1 + epsilon) times the cheapest one')
+parser.add_argument('--cost-profile', default=config.COST_PROFILE,
+                    help='cost profile from profiles.json (default, boat, climber)')
+parser.add_argument('--profile', choices=['cprofile', 'sampling'], nargs='?', const='cprofile', default=None,
+                    help='profile the search and write the reports to the reports folder')
+parser.add_argument('--checkpoint', nargs='?', const=config.DEFAULT_CHECKPOINT_FOLDER, default=None,
+                    metavar='FOLDER', help="save Aki's and Draza's search state regularly and resume it when restarted")
+parser.add_argument('--output-format', choices=FORMATS, default=config.OUTPUT_FORMAT,
+                    help='path format - positions, run-length encoded directions, int32 pairs or a line per field')
+parser.add_argument('--output', default=None, help='write the path to this file instead of the standard output')
+parser.add_argument('--expansion-budget', type=int, default=None, help="stop Aki's search after this many expansions")
+parser.add_argument('--time-budget', type=float, default=None, help="stop Aki's search after this many seconds")
+parser.add_argument('--transposition', choices=['visited', 'cost'], default=None,
+                    help='let Aki skip the fields expanded before (visited), or expanded with a cheaper path (cost)')
+parser.add_argument('--startup-time', action='store_true', help='report the time until the window is shown')
+args = parser.parse_args()
+if args.output_format == 'binary' and args.output is None:
+    parser.error('the binary output format needs --output')
+if args.epsilon is not None and args.epsilon < 0:
+    parser.error('--epsilon must not be negative')
+config.COST_PROFILE = args.cost_profile
+config.PROFILE = args.profile
+config.MEMORY_LIMIT = args.memory_limit
+config.EPSILON = args.epsilon
+config.CHECKPOINT_FOLDER = args.checkpoint
+config.OUTPUT_FORMAT = args.output_format
+config.OUTPUT_FILE = args.output
+config.AKI_EXPANSION_BUDGET = args.expansion_budget
+config.AKI_TIME_BUDGET = args.time_budget
+config.AKI_TRANSPOSITION = args.transposition
+if args.startup_time:
+    config.STARTUP_BEGIN = startup_begin
 
 try:
     pygame.init()
-    g = Game()
+    g = Game(args.map, args.agent)
     g.run()
+except SearchBudgetExceeded as e:
+    print(e)
+    print(f"Search stats: {', '.join([f'{name}={value}' for name, value in e.stats.items()])}")
 except (Exception,):
     traceback.print_exc()
     input()
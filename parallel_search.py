@@ -0,0 +1,138 @@
+import glob
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import config
+from distance_field import UNREACHABLE, distance_fathers, path_to, relax
+
+
+def shared_array(shape: tuple, dtype) -> tuple:
+    memory = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def attach_array(name: str, shape: tuple, dtype) -> tuple:
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def band_worker(worker: int, bands: list, shape: tuple, costs_name: str, distances_name: str, changed_name: str,
+                barrier):
+    """
+    Relax the rows of one band of the shared distances, round after round, until no band changes in a round.
+        A band sees the rows next to it (owned by the neighbouring bands) as they were at the start of the round.
+    """
+    costs_memory, costs = attach_array(costs_name, shape, np.int64)
+    distances_memory, distances = attach_array(distances_name, shape, np.int64)
+    # flags of the bands changed in the round, followed by the number of rounds
+    changed_memory, changed = attach_array(changed_name, (len(bands) + 1,), np.int64)
+    first_row, last_row = bands[worker]
+    # the band with one row of the neighbouring bands above and below it
+    top = max(first_row - 1, 0)
+    bottom = min(last_row + 1, shape[0])
+    try:
+        while True:
+            # everyone has finished writing the previous round
+            barrier.wait()
+            local_distances = distances[top:bottom].copy()
+            # everyone has read the rows of the neighbours before they are written again
+            barrier.wait()
+            band_changed = relax(local_distances, costs[top:bottom])
+            if band_changed:
+                distances[first_row:last_row] = local_distances[first_row - top:last_row - top]
+            changed[worker] = band_changed
+            if worker == 0:
+                changed[-1] += 1
+            barrier.wait()
+            if not changed[:-1].any():
+                break
+            # everyone has seen the flags before they are set again
+            barrier.wait()
+    except BaseException:
+        # the other workers would wait for this one forever
+        barrier.abort()
+        raise
+    finally:
+        del costs, distances, changed
+        costs_memory.close()
+        distances_memory.close()
+        changed_memory.close()
+
+
+def parallel_distance_field(costs: np.ndarray, start: tuple, workers: int = None) -> tuple:
+    """
+    Return the same distance field as distance_field, computed by worker processes that each own a band of rows.
+        The costs and the distances are in shared memory, the workers only copy their own band. Bands are relaxed
+        in rounds, until no band changes, so the result is the cheapest path cost to every field.
+
+    :return: Tuple (distances, fathers, stats) - as from distance_field, and the number of workers, rounds and the
+        time of the search
+    :param costs: array of the field costs
+    :param start: (row, col) of the start field
+    :param workers: number of worker processes (default: CPU count, at most one per row)
+    """
+    begin = time.perf_counter()
+    rows = costs.shape[0]
+    workers = max(1, min(workers or os.cpu_count(), rows))
+    bands = [(rows * i // workers, rows * (i + 1) // workers) for i in range(workers)]
+
+    costs_memory, shared_costs = shared_array(costs.shape, np.int64)
+    distances_memory, distances = shared_array(costs.shape, np.int64)
+    changed_memory, changed = shared_array((workers + 1,), np.int64)
+    try:
+        shared_costs[:] = costs
+        distances[:] = UNREACHABLE
+        distances[start] = costs[start]
+        changed[:] = 0
+        barrier = multiprocessing.Barrier(workers)
+        processes = [multiprocessing.Process(target=band_worker,
+                                             args=(worker, bands, costs.shape, costs_memory.name,
+                                                   distances_memory.name, changed_memory.name, barrier))
+                     for worker in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        if any([process.exitcode != 0 for process in processes]):
+            raise RuntimeError('ERR: A worker of the parallel search failed!')
+        result = distances.copy()
+        rounds = int(changed[-1])
+    finally:
+        del shared_costs, distances, changed
+        for memory in (costs_memory, distances_memory, changed_memory):
+            memory.close()
+            memory.unlink()
+    stats = {'workers': workers, 'rounds': rounds, 'time': round(time.perf_counter() - begin, 3)}
+    return result, distance_fathers(costs, result), stats
+
+
+def parallel_path(costs: np.ndarray, start: tuple, goal: tuple, workers: int = None) -> tuple:
+    """
+    Find the cheapest path with the parallel distance field.
+
+    :return: Tuple (path, cost, stats) - list of (row, col) from start to goal, its cost and the search statistics
+    """
+    distances, fathers, stats = parallel_distance_field(costs, tuple(start), workers)
+    return path_to(fathers, tuple(goal)), int(distances[tuple(goal)]), stats
+
+
+if __name__ == '__main__':
+    # cross-check with Draza's cheapest paths on all maps
+    from render import init_headless
+    init_headless()
+    from game import Game
+    from distance_field import cost_array
+    from profiles import cost_grid
+
+    for map_name in sorted(glob.glob(os.path.join(config.MAP_FOLDER, '*.txt'))):
+        g = Game(map_name, 'Draza', headless=True)
+        draza_cost = sum([tile.cost() for tile in g.agent.get_agent_path(g.tile_map, g.goal)])
+        parallel_cost = parallel_path(cost_array(cost_grid(g.tile_map)), g.start, g.goal, 4)[1]
+        status = 'OK' if draza_cost == parallel_cost else 'MISMATCH'
+        print(f'{os.path.basename(map_name)}: Draza {draza_cost}, parallel search {parallel_cost} - {status}')
+        if status != 'OK':
+            raise SystemExit(1)
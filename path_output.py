@@ -0,0 +1,84 @@
+import sys
+from array import array
+
+FORMATS = ['text', 'rle', 'binary', 'stream']
+
+# direction letter of a step by its (row, col) change
+DIRECTIONS = {(-1, 0): 'N', (0, 1): 'E', (1, 0): 'S', (0, -1): 'W'}
+STEPS = {letter: step for step, letter in DIRECTIONS.items()}
+
+
+def rle_directions(positions: list) -> str:
+    """
+    Return the steps of the path as run-length encoded directions - E12S3W1 is 12 steps east, 3 south and 1 west.
+    """
+    runs = []
+    for (row, col), (next_row, next_col) in zip(positions, positions[1:]):
+        letter = DIRECTIONS[(next_row - row, next_col - col)]
+        if runs and runs[-1][0] == letter:
+            runs[-1][1] += 1
+        else:
+            runs.append([letter, 1])
+    return ''.join([f'{letter}{count}' for letter, count in runs])
+
+
+def rle_positions(start: tuple, directions: str) -> list:
+    # inverse of rle_directions
+    positions = [tuple(start)]
+    index = 0
+    while index < len(directions):
+        letter = directions[index]
+        end = index + 1
+        while end < len(directions) and directions[end].isdigit():
+            end += 1
+        row_step, col_step = STEPS[letter]
+        for _ in range(int(directions[index + 1:end])):
+            row, col = positions[-1]
+            positions.append((row + row_step, col + col_step))
+        index = end
+    return positions
+
+
+def write_binary_path(file_name: str, positions: list):
+    # int32 pairs row, col in the native byte order, readable with numpy.fromfile(file_name, np.int32).reshape(-1, 2)
+    with open(file_name, 'wb') as f:
+        array('i', [value for position in positions for value in position]).tofile(f)
+
+
+def read_binary_path(file_name: str) -> list:
+    values = array('i')
+    with open(file_name, 'rb') as f:
+        values.frombytes(f.read())
+    return [(values[i], values[i + 1]) for i in range(0, len(values), 2)]
+
+
+def write_path(positions: list, path_format: str = 'text', file_name: str = None):
+    """
+    Write the path in the given format - text (comma separated positions), rle (the start position and the run-length
+        encoded directions), binary (int32 pairs, only to a file) or stream (one "row col" line per field, written
+        as they are formatted, without building the whole text).
+
+    :param positions: list of (row, col) from the start to the goal
+    :param path_format: one of FORMATS
+    :param file_name: output file, None - the standard output
+    """
+    if path_format == 'binary':
+        if file_name is None:
+            raise ValueError('ERR: Binary path output needs a file!')
+        write_binary_path(file_name, positions)
+        print(f'Path: {file_name}')
+        return
+    f = open(file_name, 'w') if file_name is not None else sys.stdout
+    try:
+        if path_format == 'text':
+            f.write(f"Path: {', '.join([str(position) for position in positions])}\n")
+        elif path_format == 'rle':
+            f.write(f'Path: {positions[0]} {rle_directions(positions)}\n')
+        elif path_format == 'stream':
+            for row, col in positions:
+                f.write(f'{row} {col}\n')
+        else:
+            raise ValueError(f'ERR: Unknown path format {path_format}!')
+    finally:
+        if f is not sys.stdout:
+            f.close()
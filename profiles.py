@@ -0,0 +1,71 @@
+import json
+
+import config
+from grid import CostGrid
+
+# number of (map, profile) cost grids kept
+CACHE_SIZE = 16
+# field kinds every profile has to price - road, grass, mud, dune, water and stone
+FIELD_KINDS = ['r', 'g', 'm', 'd', 'w', 's']
+
+loaded_profiles = dict()
+# (id of the map, profile) -> (map, its cost grid), the map is kept so its id can't be reused
+cost_grids = dict()
+
+
+def load_profiles(file_name: str = None) -> dict:
+    """
+    Return the cost profiles from the file (default: config.PROFILES_FILE) - profile name -> field kind -> cost.
+        Every profile has to give a positive integer cost to all the FIELD_KINDS.
+    """
+    file_name = file_name or config.PROFILES_FILE
+    if file_name not in loaded_profiles:
+        with open(file_name, 'r') as f:
+            profiles = json.load(f)
+        for name, costs in profiles.items():
+            missing = [kind for kind in FIELD_KINDS if kind not in costs]
+            if missing:
+                raise ValueError(f'ERR: Cost profile {name} in {file_name} has no cost of {", ".join(missing)}!')
+            invalid = [kind for kind, cost in costs.items() if type(cost) is not int or cost <= 0]
+            if invalid:
+                raise ValueError(f'ERR: Cost profile {name} in {file_name} has invalid costs of {", ".join(invalid)}!')
+        loaded_profiles[file_name] = profiles
+    return loaded_profiles[file_name]
+
+
+def terrain_costs(profile: str = None) -> dict:
+    """
+    Return the costs of the field kinds in the profile (default: the active one, config.COST_PROFILE).
+    """
+    profiles = load_profiles()
+    name = profile or config.COST_PROFILE
+    if name not in profiles:
+        raise ValueError(f'ERR: Unknown cost profile {name}! {", ".join(profiles)}')
+    return profiles[name]
+
+
+def min_cost(profile: str = None) -> int:
+    # the cheapest field, heuristics multiply the distance with it
+    return min(terrain_costs(profile).values())
+
+
+def cost_grid(game_map: list, profile: str = None) -> CostGrid:
+    """
+    Return the costs of the map fields in the profile, computed once per map and profile.
+
+    :param game_map: map as the list of rows of tiles or of field kinds
+    :param profile: profile name (default: the active one)
+    """
+    name = profile or config.COST_PROFILE
+    entry = cost_grids.get((id(game_map), name))
+    if entry is not None and entry[0] is game_map:
+        return entry[1]
+
+    costs = terrain_costs(name)
+    # unknown kinds (and the treasures) are grass, the same as in the game
+    grid = CostGrid([[costs.get(field if isinstance(field, str) else field.kind(), costs['g']) for field in row]
+                     for row in game_map])
+    if len(cost_grids) >= CACHE_SIZE:
+        del cost_grids[next(iter(cost_grids))]
+    cost_grids[(id(game_map), name)] = (game_map, grid)
+    return grid
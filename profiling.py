@@ -0,0 +1,129 @@
+import cProfile
+import collections
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+import config
+
+
+class StackSampler(threading.Thread):
+    """
+    Sampling profiler - records the call stack of the given thread every interval seconds, for long runs where
+        cProfile would slow the search down too much. The stacks are written in the collapsed format of flamegraphs.
+    """
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def write_collapsed(self, file_name):
+        with open(file_name, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class PeakMemoryWatcher(threading.Thread):
+    """
+    Keeps the tracemalloc snapshot taken closest to the peak of the traced memory. The structures of a search are
+        freed when it returns, so a snapshot taken afterwards would show almost nothing.
+    """
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.snapshot = None
+        self.snapshot_size = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.check()
+
+    def check(self):
+        current = tracemalloc.get_traced_memory()[0]
+        # a new snapshot only when the memory grew by a tenth, taking one costs as much as the number of allocations
+        if current > self.snapshot_size * 1.1:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.check()
+
+    def write_report(self, file_name, peak, limit=25):
+        with open(file_name, 'w') as f:
+            f.write(f'Peak traced memory: {peak / 1024:.1f} KiB\n')
+            f.write(f'Snapshot at {self.snapshot_size / 1024:.1f} KiB, top {limit} allocation sites:\n')
+            for statistic in self.snapshot.statistics('lineno')[:limit]:
+                f.write(f'{statistic}\n')
+
+
+def profile_call(function, report_name, sampling=False, folder=None):
+    """
+    Call the function under the profiler and write the reports to folder/report_name.* - pstats dump and its text
+        summary (or collapsed stacks with sampling), and the allocations near the memory peak.
+
+    :return: Result of the function
+    :param function: function without arguments, the profiled part of the program
+    :param report_name: prefix of the report files, such as agent_map
+    :param sampling: use the sampling profiler instead of cProfile
+    :param folder: folder for the reports (default: config.PROFILE_FOLDER)
+    """
+    folder = folder or config.PROFILE_FOLDER
+    os.makedirs(folder, exist_ok=True)
+    prefix = os.path.join(folder, report_name)
+
+    tracemalloc.start()
+    watcher = PeakMemoryWatcher(0.05)
+    watcher.start()
+    if sampling:
+        profiler = StackSampler(threading.get_ident(), config.SAMPLING_INTERVAL)
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    begin = time.perf_counter()
+    try:
+        return function()
+    finally:
+        duration = time.perf_counter() - begin
+        if sampling:
+            profiler.stop()
+            profiler.write_collapsed(prefix + '.collapsed')
+            reports = [prefix + '.collapsed']
+        else:
+            profiler.disable()
+            profiler.dump_stats(prefix + '.pstats')
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats('tottime').print_stats(30)
+            with open(prefix + '.txt', 'w') as f:
+                f.write(summary.getvalue())
+            reports = [prefix + '.pstats', prefix + '.txt']
+        watcher.stop()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        watcher.write_report(prefix + '.memory.txt', peak)
+        reports.append(prefix + '.memory.txt')
+        print(f'Profiled {duration:.3f} s, peak memory {peak / 1024:.1f} KiB, reports: {", ".join(reports)}')
@@ -0,0 +1,184 @@
+import argparse
+import glob
+import heapq
+import json
+import os
+import sys
+import tempfile
+import time
+
+import config
+from profiles import cost_grid
+from render import AGENTS, init_headless
+from synthetic import generate_map, save_map
+
+# optimal agents, their path cost has to match the reference
+OPTIMAL_AGENTS = ['Draza', 'Bole']
+# (size, seed) of the synthetic maps, chosen so that Aki's DFS finishes in milliseconds
+SYNTHETIC_CORPUS = [(10, 0), (10, 1), (20, 0), (20, 1), (30, 1)]
+# (size, seed) of the synthetic maps that take the other agents over a second, too big for Aki
+HEAVY_CORPUS = [(60, 1)]
+HEAVY_AGENTS = ['Jocke', 'Draza', 'Bole']
+# a run may take up to TIME_TOLERANCE times its recorded time, both relative to the calibration search; the time
+# only fails the run with --check-time, since it varies with the load of the machine
+TIME_TOLERANCE = 2.0
+# searches are repeated for at least this many seconds, so the best time of the fast ones is stable
+TIMING_DURATION = 0.2
+# (size, seed) of the synthetic map of the calibration search, timed before each search of a run, so the times are
+# compared on a slower or busier machine too
+CALIBRATION_MAP = (20, 0)
+
+
+def reference_cost(grid, start, goal):
+    # plain Dijkstra, independent of the agents - cost of the cheapest path, including the start field
+    distances = {start: grid.cost(*start)}
+    queue = [(distances[start], start)]
+    while queue:
+        distance, field = heapq.heappop(queue)
+        if field == goal:
+            return distance
+        if distance > distances[field]:
+            continue
+        for row, col, _ in grid.neighbours(*field):
+            next_distance = distance + grid.cost(row, col)
+            if next_distance < distances.get((row, col), next_distance + 1):
+                distances[(row, col)] = next_distance
+                heapq.heappush(queue, (next_distance, (row, col)))
+    return None
+
+
+def calibration_grid():
+    # the fixed map of the calibration search, the reference Dijkstra between its corners
+    size, seed = CALIBRATION_MAP
+    char_map, start, goal = generate_map(size, size, seed)
+    return cost_grid(char_map), start, goal
+
+
+def corpus(folder):
+    # (case name, map file, agents - None for all) of all the maps and the synthetic ones, written to the folder
+    cases = [(os.path.splitext(os.path.basename(map_name))[0], map_name, None)
+             for map_name in sorted(glob.glob(os.path.join(config.MAP_FOLDER, '*.txt')))]
+    for synthetic_corpus, case_agents in ((SYNTHETIC_CORPUS, None), (HEAVY_CORPUS, HEAVY_AGENTS)):
+        for size, seed in synthetic_corpus:
+            map_name = os.path.join(folder, f'synthetic_{size}_{seed}.txt')
+            save_map(map_name, *generate_map(size, size, seed))
+            cases.append((os.path.splitext(os.path.basename(map_name))[0], map_name, case_agents))
+    return cases
+
+
+def run_case(map_name, agent_name, repeat):
+    """
+    Search the path from the start to the goal of the map (the treasures marked with x are not collected).
+
+    :return: dict with the path as run-length encoded directions, its cost, the expansions and the best time of the
+        searches, repeated at least repeat times and TIMING_DURATION seconds, the best time of the calibration
+        searches between them and the reference cost
+    """
+    from game import Game
+    from path_output import rle_directions
+
+    g = Game(map_name, agent_name, headless=True)
+    grid, calibration_start, calibration_goal = calibration_grid()
+    duration = calibration = None
+    searches = 0
+    total_duration = 0
+    while searches < repeat or total_duration < TIMING_DURATION:
+        begin = time.perf_counter()
+        reference_cost(grid, calibration_start, calibration_goal)
+        calibration = min(calibration or float('inf'), time.perf_counter() - begin)
+        begin = time.perf_counter()
+        path = g.agent.get_agent_path(g.tile_map, g.goal)
+        search_duration = time.perf_counter() - begin
+        duration = min(duration or float('inf'), search_duration)
+        total_duration += search_duration
+        searches += 1
+    positions = [tile.position() for tile in path]
+    for (row, col), (next_row, next_col) in zip(positions, positions[1:]):
+        g.check_move(row, col, next_row, next_col)
+    if positions[0] != tuple(g.start) or positions[-1] != tuple(g.goal):
+        raise Exception(f'ERR: Path goes from {positions[0]} to {positions[-1]}, not from {g.start} to {g.goal}!')
+    return {'path': rle_directions(positions),
+            'cost': sum([tile.cost() for tile in path]),
+            'expansions': g.agent.stats.get('expansions'),
+            'time': round(duration, 6),
+            'calibration': round(calibration, 6),
+            'reference_cost': reference_cost(cost_grid(g.tile_map), tuple(g.start), tuple(g.goal))}
+
+
+def check_case(agent_name, result, record, check_time):
+    """
+    Check the run against the reference and the record.
+
+    :return: Tuple (failures, warnings) - lists of the messages, a slow run is a failure only with check_time
+    """
+    failures = []
+    warnings = []
+    if agent_name in OPTIMAL_AGENTS and result['cost'] != result['reference_cost']:
+        failures.append(f"cost {result['cost']} is not optimal ({result['reference_cost']})")
+    if record is None:
+        return failures + ['no record, run with --record'], warnings
+    if result['path'] != record['path']:
+        # Aki's and Jocke's order of expanding defines their paths, the optimal agents' paths are in the solutions
+        failures.append(f"path changed from {record['path']} to {result['path']}")
+    if result['expansions'] is not None and result['expansions'] > record['expansions']:
+        failures.append(f"expansions {result['expansions']} over the budget {record['expansions']}")
+    # times in the calibration searches of their machine
+    relative_time = result['time'] / result['calibration']
+    relative_budget = record['time'] / record['calibration'] * TIME_TOLERANCE
+    if relative_time > relative_budget:
+        (failures if check_time else warnings).append(
+            f"time {relative_time:.2f} calibration searches over the budget {relative_budget:.2f}")
+    return failures, warnings
+
+
+def run(agents, repeat, record, check_time=False):
+    """
+    Run the agents on the corpus and check them. With record, the results are saved as the new budgets instead.
+        The time over the budget fails a run only with check_time, otherwise it is a warning.
+
+    :return: Number of the failed runs
+    """
+    records = dict()
+    if os.path.exists(config.REGRESSION_FILE):
+        with open(config.REGRESSION_FILE, 'r') as f:
+            records = json.load(f)
+    failed = 0
+    with tempfile.TemporaryDirectory() as folder:
+        for case, map_name, case_agents in corpus(folder):
+            for agent_name in agents:
+                if case_agents is not None and agent_name not in case_agents:
+                    continue
+                key = f'{case}/{agent_name}'
+                result = run_case(map_name, agent_name, repeat)
+                # a recorded run is its own record, only the optimality is checked
+                failures, warnings = check_case(agent_name, result, result if record else records.get(key), check_time)
+                if record:
+                    records[key] = {name: result[name] for name in ['path', 'cost', 'expansions', 'time',
+                                                                     'calibration']}
+                status = 'FAIL' if failures else 'ok'
+                print(f"{status:>4} {key:<28} cost {result['cost']:>6} expansions {result['expansions']} "
+                      f"time {result['time']:.6f} s")
+                for failure in failures:
+                    print(f'     - {failure}')
+                for warning in warnings:
+                    print(f'     - warning: {warning}')
+                failed += bool(failures)
+    if record:
+        with open(config.REGRESSION_FILE, 'w') as f:
+            json.dump(records, f, indent=1, sort_keys=True)
+        print(f'Recorded {len(records)} runs to {config.REGRESSION_FILE}')
+    return failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the paths, optimality, expansions and time of the agents.')
+    parser.add_argument('--agents', default=','.join(AGENTS), help='comma separated agent names')
+    parser.add_argument('--repeat', type=int, default=3, help='minimal searches per run, the best time counts')
+    parser.add_argument('--record', action='store_true', help='save the results as the new paths and budgets')
+    parser.add_argument('--check-time', action='store_true', help='fail the runs slower than their budget')
+    args = parser.parse_args()
+    init_headless()
+    failed_runs = run(args.agents.split(','), args.repeat, args.record, args.check_time)
+    if failed_runs:
+        print(f'REGRESSION: {failed_runs} run(s) failed!')
+        sys.exit(1)
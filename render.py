@@ -0,0 +1,64 @@
+import argparse
+import glob
+import os
+from multiprocessing import Pool
+
+import config
+
+AGENTS = ['Aki', 'Jocke', 'Draza', 'Bole']
+
+
+def init_headless():
+    # workers draw on offscreen surfaces, the dummy display is only needed for the image conversion
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    # SDL would otherwise catch the SIGTERM the pool uses to stop its workers
+    os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'
+    import pygame
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+def solution_file_name(map_name, agent_name, output_folder):
+    map_id = os.path.splitext(os.path.basename(map_name))[0]
+    return os.path.join(output_folder, agent_name.lower(), f'{map_id}_solution.png')
+
+
+def render_solution(job):
+    """
+    Render the game over screen of the agent on the map and save it as PNG.
+
+    :return: Name of the saved image
+    :param job: tuple (map_name, agent_name, output_folder)
+    """
+    import pygame
+    from game import Game
+
+    map_name, agent_name, output_folder = job
+    g = Game(map_name, agent_name, headless=True)
+    path = g.get_path()
+    g.game_over = True
+    g.show_path(path)
+    g.render()
+    file_name = solution_file_name(map_name, agent_name, output_folder)
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    pygame.image.save(g.screen, file_name)
+    return file_name
+
+
+def render_solutions(map_names, agent_names, output_folder=config.SOLUTIONS_FOLDER, processes=None):
+    # jobs of one map are handed to the same worker, so its images are scaled only once for that tile size
+    jobs = [(map_name, agent_name, output_folder) for map_name in map_names for agent_name in agent_names]
+    with Pool(processes, initializer=init_headless) as pool:
+        for file_name in pool.imap(render_solution, jobs, chunksize=len(agent_names)):
+            print(file_name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render the solution images of the agents without opening a window.')
+    parser.add_argument('maps', nargs='*', help='map files (default: all maps from the maps folder)')
+    parser.add_argument('--agents', default=','.join(AGENTS), help='comma separated agent names')
+    parser.add_argument('--output', default=config.SOLUTIONS_FOLDER, help='folder for the <agent>/<map>_solution.png')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes (default: CPU count)')
+    args = parser.parse_args()
+    render_solutions(args.maps or sorted(glob.glob(os.path.join(config.MAP_FOLDER, '*.txt'))),
+                     args.agents.split(','), args.output, args.processes)
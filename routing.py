@@ -0,0 +1,109 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from distance_field import UNREACHABLE, relax
+
+# up to this many treasures the visit order is found exactly, above it heuristically
+EXACT_ORDER_LIMIT = 12
+# number of maps whose pairwise costs are kept
+CACHE_SIZE = 32
+
+pairwise_costs_cache = dict()
+
+
+def pairwise_costs(costs: np.ndarray, fields: list, threads: int = None) -> list:
+    """
+    Return the costs of the cheapest paths between every two of the fields, as a matrix - costs[i][j] is the cost of
+        going from fields[i] to fields[j] without the cost of fields[i] itself. The distances from each field are
+        relaxed in parallel (NumPy releases the GIL, so threads are enough), without the fathers, and the result is
+        cached per map.
+
+    :param costs: array of the field costs
+    :param fields: list of (row, col), the start and the treasures
+    :param threads: number of worker threads (default: CPU count, at most one per field)
+    """
+    key = (hashlib.sha1(costs.tobytes()).hexdigest(), costs.shape, tuple(fields))
+    if key in pairwise_costs_cache:
+        return pairwise_costs_cache[key]
+
+    def costs_from(field):
+        distances = np.full(costs.shape, UNREACHABLE, dtype=np.int64)
+        distances[field] = costs[field]
+        relax(distances, costs)
+        return [int(distances[other]) - int(costs[field]) for other in fields]
+
+    with ThreadPoolExecutor(max(1, min(threads or os.cpu_count(), len(fields)))) as executor:
+        result = list(executor.map(costs_from, fields))
+
+    if len(pairwise_costs_cache) >= CACHE_SIZE:
+        del pairwise_costs_cache[next(iter(pairwise_costs_cache))]
+    pairwise_costs_cache[key] = result
+    return result
+
+
+def route_cost(costs: list, order: list) -> int:
+    return sum([costs[field][next_field] for field, next_field in zip([0] + order, order)])
+
+
+def exact_visit_order(costs: list) -> list:
+    # Held-Karp - cheapest[(visited, last)] is the cheapest way from the start through the visited set ending in last
+    count = len(costs) - 1
+    cheapest = {(1 << i, i): (costs[0][i + 1], -1) for i in range(count)}
+    for visited in range(1, 1 << count):
+        for last in range(count):
+            if (visited, last) not in cheapest:
+                continue
+            cost = cheapest[(visited, last)][0]
+            for following in range(count):
+                if visited & (1 << following):
+                    continue
+                key = (visited | (1 << following), following)
+                next_cost = cost + costs[last + 1][following + 1]
+                if key not in cheapest or next_cost < cheapest[key][0]:
+                    cheapest[key] = (next_cost, last)
+
+    visited = (1 << count) - 1
+    last = min(range(count), key=lambda i: cheapest[(visited, i)][0])
+    order = []
+    while last != -1:
+        order.append(last + 1)
+        visited, last = visited & ~(1 << last), cheapest[(visited, last)][1]
+    order.reverse()
+    return order
+
+
+def heuristic_visit_order(costs: list) -> list:
+    # nearest neighbour, improved with 2-opt (reversing parts of the route) while it gets cheaper
+    order = []
+    remaining = set(range(1, len(costs)))
+    field = 0
+    while remaining:
+        field = min(remaining, key=lambda other: costs[field][other])
+        order.append(field)
+        remaining.remove(field)
+
+    improved = True
+    while improved:
+        improved = False
+        best_cost = route_cost(costs, order)
+        for i in range(len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                candidate_cost = route_cost(costs, candidate)
+                if candidate_cost < best_cost:
+                    order, best_cost, improved = candidate, candidate_cost, True
+    return order
+
+
+def visit_order(costs: list) -> list:
+    """
+    Return the order in which the treasures are collected, starting from the start field, as the list of indexes
+        into the pairwise costs (the start is 0, treasures 1 to n). The order is the cheapest one for up to
+        EXACT_ORDER_LIMIT treasures.
+    """
+    if len(costs) - 1 <= EXACT_ORDER_LIMIT:
+        return exact_visit_order(costs)
+    return heuristic_visit_order(costs)
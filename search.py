@@ -0,0 +1,327 @@
+import heapq
+import math
+
+from grid import Grid
+
+
+class NoPathFound(Exception):
+    pass
+
+
+class SearchBudgetExceeded(Exception):
+    # the search ran out of its expansions or time, stats describe how far it got
+    def __init__(self, message, stats):
+        super().__init__(message)
+        self.stats = stats
+
+
+class MemoryLimitReached(Exception):
+    # the open list of the frontier search does not fit in the memory limit
+    pass
+
+
+def manhattan_distance(row, col, goal_row, goal_col):
+    return abs(row - goal_row) + abs(col - goal_col)
+
+
+# bytes of an entry of the open list (with its heap entry), of a remembered father, of a transposition table entry
+# (with its heap entry) and of a path field, measured with tracemalloc on 64-bit CPython 3.11 and rounded up
+OPEN_ENTRY_BYTES = 560
+FATHER_ENTRY_BYTES = 270
+TABLE_ENTRY_BYTES = 330
+PATH_FIELD_BYTES = 130
+# bit of each direction in the used directions of an open field (N, E, S, W) and the opposite directions
+DIRECTION_BITS = {4: 1, 3: 2, 2: 4, 1: 8}
+OPPOSITE_DIRECTIONS = {4: 2, 3: 1, 2: 4, 1: 3}
+
+
+def ida_star(grid: Grid, start: tuple, goal: tuple, field_cost: int, memory_limit: int, stats: dict) -> list:
+    """
+    Find the cheapest path with iterative deepening A*, keeping at most memory_limit fields in the transposition
+        table. The table remembers the cheapest cost each field was reached with, so branches that reach a field
+        more expensively are cut. When it is full, a field of an earlier iteration, or else the most expensive field
+        of this one, makes room for a cheaper new field. Fields that do not fit are searched again through every
+        path reaching them, so on open maps a table much smaller than the searched area costs exponential time.
+
+    :return: list of (row, col) from start to goal
+    :param grid: map to search
+    :param start: (row, col) of the start field
+    :param goal: (row, col) of the goal field
+    :param field_cost: lowest cost of a field, the heuristic is the Manhattan distance multiplied by it (0 - no
+        heuristic, as in the Branch and Bound)
+    :param memory_limit: maximal number of fields in the transposition table
+    :param stats: search statistics, updated with the expansions, iterations, peak depth and table size
+    """
+    goal_row, goal_col = goal
+    # (row, col) -> (cost, iteration in which the field was reached with that cost)
+    table = {}
+    iteration = 0
+    threshold = manhattan_distance(start[0], start[1], goal_row, goal_col) * field_cost
+
+    def make_room(cost):
+        # evict a field of an earlier iteration, or the most expensive field of this one if it costs more than cost
+        for field in stale_fields:
+            entry = table.get(field)
+            if entry is not None and entry[1] != iteration:
+                del table[field]
+                return True
+        while most_expensive and -most_expensive[0][0] > cost:
+            negative_cost, field = heapq.heappop(most_expensive)
+            if table.get(field) == (-negative_cost, iteration):
+                del table[field]
+                return True
+        return False
+
+    while True:
+        iteration += 1
+        stats['iterations'] += 1
+        next_threshold = math.inf
+        stale_fields = iter(list(table))
+        # (-cost, (row, col)) of the fields stored in this iteration, with outdated entries skipped when evicting
+        most_expensive = []
+        path = [start]
+        on_path = {start}
+        costs = [0]
+        sons = [None]
+
+        while path:
+            if sons[-1] is None:
+                # first visit of the field on top of the stack - generate its sons, the cheapest ones first
+                row, col = path[-1]
+                stats['expansions'] += 1
+                if (row, col) == goal:
+                    return path
+                cost = costs[-1]
+                fields = []
+                for next_row, next_col, direction in grid.neighbours(row, col):
+                    next_cost = cost + grid.cost(next_row, next_col)
+                    estimate = next_cost + manhattan_distance(next_row, next_col, goal_row, goal_col) * field_cost
+                    fields.append((estimate, -direction, next_row, next_col, next_cost))
+                fields.sort()
+                sons[-1] = iter(fields)
+
+            son = next(sons[-1], None)
+            if son is None:
+                on_path.remove(path.pop())
+                costs.pop()
+                sons.pop()
+                continue
+
+            estimate, _, row, col, cost = son
+            if estimate > threshold:
+                next_threshold = min(next_threshold, estimate)
+                continue
+            if (row, col) in on_path:
+                continue
+            entry = table.get((row, col))
+            if entry is not None and (cost > entry[0] or cost == entry[0] and entry[1] == iteration):
+                continue
+            if entry is not None or len(table) < memory_limit or make_room(cost):
+                table[(row, col)] = (cost, iteration)
+                heapq.heappush(most_expensive, (-cost, (row, col)))
+                if len(most_expensive) > 2 * memory_limit:
+                    # drop the outdated entries, so the heap stays in the limit too
+                    most_expensive = [(-entry_cost, field) for field, (entry_cost, entry_iteration) in table.items()
+                                      if entry_iteration == iteration]
+                    heapq.heapify(most_expensive)
+                stats['peak_table_entries'] = max(stats['peak_table_entries'], len(table))
+
+            path.append((row, col))
+            on_path.add((row, col))
+            costs.append(cost)
+            sons.append(None)
+            stats['peak_depth'] = max(stats['peak_depth'], len(path))
+
+        if next_threshold == math.inf:
+            raise NoPathFound(f'ERR: There is no path from {start} to {goal}!')
+        threshold = next_threshold
+
+
+def frontier_search(grid: Grid, start: tuple, goal: tuple, field_cost: int, memory_limit: int, stats: dict) -> tuple:
+    """
+    Search the cheapest path with A* that keeps only the open fields. An expanded field is forgotten; the open fields
+        remember the directions they were reached from, so the expanded fields are never generated again. Every open
+        field carries its relay - the field its path reached after half as many steps as the Manhattan distance from
+        the start to the goal. The fathers of the fields are remembered too, while they fit in the memory limit with the
+        open list.
+
+    :return: Tuple (path, complete) - the whole path if the fathers fit in the memory (or the goal is the next field
+        of the path), else [start, relay, goal] and False, the path goes through the relay
+    :raise MemoryLimitReached: the open list alone does not fit in the memory limit
+    :param memory_limit: maximal number of entries of the open list and the fathers together
+    :param stats: search statistics, updated with the expansions and the peak entries
+    """
+    goal_row, goal_col = goal
+    relay_depth = max(1, manhattan_distance(start[0], start[1], goal_row, goal_col) // 2)
+    # (row, col) -> [cost, bits of the directions it was reached from, depth, relay]
+    open_fields = {start: [0, 0, 0, None]}
+    fathers = {start: None}
+    # (estimate, -cost, (row, col)) - with equal estimates the deeper ones go first
+    list_for_expanding = [(manhattan_distance(start[0], start[1], goal_row, goal_col) * field_cost, 0, start)]
+
+    while list_for_expanding:
+        _, negative_cost, field = heapq.heappop(list_for_expanding)
+        entry = open_fields.get(field)
+        if entry is None or entry[0] != -negative_cost:
+            continue
+        del open_fields[field]
+        stats['expansions'] += 1
+        cost, used_directions, depth, relay = entry
+        if field == goal:
+            if fathers is not None:
+                path = [goal]
+                while fathers[path[-1]] is not None:
+                    path.append(fathers[path[-1]])
+                path.reverse()
+                return path, True
+            return ([start, goal], True) if depth == 1 else ([start, relay, goal], False)
+        for next_row, next_col, direction in grid.neighbours(*field):
+            if used_directions & DIRECTION_BITS[direction]:
+                continue
+            next_field = (next_row, next_col)
+            next_cost = cost + grid.cost(next_row, next_col)
+            next_relay = next_field if depth + 1 == relay_depth else relay
+            back = DIRECTION_BITS[OPPOSITE_DIRECTIONS[direction]]
+            next_entry = open_fields.get(next_field)
+            if next_entry is not None:
+                next_entry[1] |= back
+                if next_cost >= next_entry[0]:
+                    continue
+                next_entry[0], next_entry[2], next_entry[3] = next_cost, depth + 1, next_relay
+            else:
+                open_fields[next_field] = [next_cost, back, depth + 1, next_relay]
+            if fathers is not None:
+                fathers[next_field] = field
+            estimate = next_cost + manhattan_distance(next_row, next_col, goal_row, goal_col) * field_cost
+            heapq.heappush(list_for_expanding, (estimate, -next_cost, next_field))
+
+        if len(list_for_expanding) + (len(fathers) if fathers is not None else 0) > memory_limit:
+            if fathers is not None:
+                # the rest of the path is found through the relays
+                fathers = None
+            elif len(list_for_expanding) > memory_limit:
+                if len(open_fields) > memory_limit:
+                    raise MemoryLimitReached()
+                # drop the entries of the fields reached more cheaply later
+                list_for_expanding = [(open_cost + manhattan_distance(row, col, goal_row, goal_col) * field_cost,
+                                       -open_cost, (row, col)) for (row, col), (open_cost, _, _, _)
+                                      in open_fields.items()]
+                heapq.heapify(list_for_expanding)
+        stats['peak_open_entries'] = max(stats['peak_open_entries'], len(list_for_expanding))
+        stats['peak_father_entries'] = max(stats['peak_father_entries'], len(fathers) if fathers is not None else 0)
+
+    raise NoPathFound(f'ERR: There is no path from {start} to {goal}!')
+
+
+def memory_bounded_search(grid: Grid, start: tuple, goal: tuple, field_cost: int, memory_limit: int) -> tuple:
+    """
+    Find the cheapest path keeping at most memory_limit search entries, with divide and conquer frontier search. The
+        frontier search finds the cost of the cheapest path and a relay field in its middle, then the parts before
+        and after the relay are searched the same way, down to neighbouring fields or parts whose search fits in the
+        limit with all its fathers. Memory grows with the open list, not with the searched area, and the extra time
+        is about the logarithm of the path length times one search. A part whose open list alone does not fit in
+        the limit is searched with IDA* and a transposition table of memory_limit fields, which can take
+        exponentially longer on open maps.
+
+    :return: Tuple (path, stats) - list of (row, col) from start to goal and the search statistics, with the peak
+        entries of the open list, the fathers and the transposition table, the peak number of parts waiting for
+        their search and the estimated peak bytes of all of them and of the path
+    :param grid: map to search
+    :param start: (row, col) of the start field
+    :param goal: (row, col) of the goal field
+    :param field_cost: lowest cost of a field, the heuristic is the Manhattan distance multiplied by it (0 - no
+        heuristic, as in Dijkstra's algorithm)
+    :param memory_limit: maximal number of entries of the search, at least 1
+    """
+    stats = {'expansions': 0, 'searches': 0, 'ida_star_searches': 0, 'iterations': 0, 'peak_open_entries': 0,
+             'peak_father_entries': 0, 'peak_table_entries': 0, 'peak_depth': 0, 'peak_parts': 0,
+             'memory_limit': memory_limit}
+    path = [start]
+    # parts of the path still to search, the next one on top
+    parts = [(start, goal)]
+    while parts:
+        stats['peak_parts'] = max(stats['peak_parts'], len(parts))
+        part_start, part_goal = parts.pop()
+        if part_start == part_goal:
+            continue
+        stats['searches'] += 1
+        try:
+            part_path, complete = frontier_search(grid, part_start, part_goal, field_cost, memory_limit, stats)
+        except MemoryLimitReached:
+            stats['ida_star_searches'] += 1
+            part_path, complete = ida_star(grid, part_start, part_goal, field_cost, memory_limit, stats), True
+        if complete:
+            path.extend(part_path[1:])
+        else:
+            relay = part_path[1]
+            parts.append((relay, part_goal))
+            parts.append((part_start, relay))
+    # the peaks of the searches, the waiting parts and the path, as if they all were at the same time
+    stats['peak_bytes'] = (stats['peak_open_entries'] * OPEN_ENTRY_BYTES +
+                           stats['peak_father_entries'] * FATHER_ENTRY_BYTES +
+                           stats['peak_table_entries'] * TABLE_ENTRY_BYTES +
+                           (stats['peak_depth'] + 2 * stats['peak_parts'] + len(path)) * PATH_FIELD_BYTES)
+    return path, stats
+
+
+def weighted_a_star(grid: Grid, start: tuple, goal: tuple, field_cost: int, epsilon: float) -> tuple:
+    """
+    Find a path costing at most (1 + epsilon) times the cheapest one, with A* whose heuristic is inflated by
+        (1 + epsilon). Expanded fields are never reopened; a cheaper way found to one of them only lowers the bound
+        on the cheapest cost, so the bound actually achieved is reported in the stats.
+
+    :return: Tuple (path, stats) - list of (row, col) from start to goal and the search statistics
+    :param grid: map to search
+    :param start: (row, col) of the start field
+    :param goal: (row, col) of the goal field
+    :param field_cost: lowest cost of a field, the heuristic is the Manhattan distance multiplied by it
+    :param epsilon: allowed relative excess of the path cost, 0 - the cheapest path
+    """
+    if epsilon < 0:
+        raise ValueError(f'ERR: Epsilon {epsilon} is negative!')
+    goal_row, goal_col = goal
+    weight = 1.0 + epsilon
+    start_estimate = manhattan_distance(start[0], start[1], goal_row, goal_col) * field_cost
+    costs = {start: 0}
+    fathers = {start: None}
+    expanded = set()
+    # lowest cost + heuristic of the expanded fields that were reached more cheaply later
+    reopen_bound = math.inf
+    # (weighted estimate, heuristic, cost, (row, col)) - with equal estimates the ones closer to the goal go first
+    list_for_expanding = [(start_estimate * weight, start_estimate, 0, start)]
+
+    while list_for_expanding:
+        _, heuristic, cost, field = heapq.heappop(list_for_expanding)
+        if field in expanded or cost > costs[field]:
+            continue
+        expanded.add(field)
+        if field == goal:
+            break
+        for next_row, next_col, _ in grid.neighbours(*field):
+            next_field = (next_row, next_col)
+            next_cost = cost + grid.cost(next_row, next_col)
+            if next_cost >= costs.get(next_field, math.inf):
+                continue
+            next_heuristic = manhattan_distance(next_row, next_col, goal_row, goal_col) * field_cost
+            if next_field in expanded:
+                reopen_bound = min(reopen_bound, next_cost + next_heuristic)
+                continue
+            costs[next_field] = next_cost
+            fathers[next_field] = field
+            heapq.heappush(list_for_expanding, (next_cost + next_heuristic * weight, next_heuristic, next_cost,
+                                                next_field))
+    else:
+        raise NoPathFound(f'ERR: There is no path from {start} to {goal}!')
+
+    path = [goal]
+    while fathers[path[-1]] is not None:
+        path.append(fathers[path[-1]])
+    path.reverse()
+
+    # the cheapest path goes either through a field waiting for expansion or through a field reached too late
+    lower_bound = min([costs[goal], reopen_bound] + [cost + heuristic for _, heuristic, cost, field
+                                                      in list_for_expanding if cost == costs[field]])
+    start_cost = grid.cost(*start)
+    stats = {'expansions': len(expanded), 'epsilon': epsilon,
+             'bound': round(min(weight, (costs[goal] + start_cost) / (lower_bound + start_cost)), 4)}
+    return path, stats
@@ -0,0 +1,164 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+from render import init_headless
+
+AGENTS = ['ExampleAgent', 'Aki', 'Jocke', 'Draza', 'Bole']
+
+# maps loaded in the worker process, map_id -> Game
+loaded_games = dict()
+
+
+def map_ids():
+    return sorted([os.path.splitext(os.path.basename(map_name))[0]
+                   for map_name in glob.glob(os.path.join(config.MAP_FOLDER, '*.txt'))])
+
+
+def load_game(map_id):
+    from game import Game
+
+    if map_id not in loaded_games:
+        loaded_games[map_id] = Game(os.path.join(config.MAP_FOLDER, f'{map_id}.txt'), 'ExampleAgent', headless=True)
+    return loaded_games[map_id]
+
+
+def init_worker(preloaded_map_ids):
+    init_headless()
+    for map_id in preloaded_map_ids:
+        load_game(map_id)
+
+
+def find_path(map_id, agent_name, start, goal, cost_profile):
+    """
+    Find the agent's path on the loaded map, in the worker process.
+
+    :return: dict with the path as the list of [row, col], its cost and length, the search stats and the time spent
+        in the worker
+    :param map_id: map file name from the maps folder, without .txt
+    :param agent_name: agent name
+    :param start: [row, col] of the start field, None - the one from the map file
+    :param goal: [row, col] of the goal field, None - the one from the map file
+    :param cost_profile: cost profile, None - the default one
+    """
+    import sprites
+    from profiles import terrain_costs
+
+    begin = time.perf_counter()
+    # the maps stay loaded, switching the profile only selects other costs (and their cached grid)
+    config.COST_PROFILE = cost_profile or 'default'
+    terrain_costs()
+    g = load_game(map_id)
+    start = tuple(start) if start is not None else g.start
+    goal = tuple(goal) if goal is not None else g.goal
+    for row, col in (start, goal):
+        if not (0 <= row < len(g.tile_map) and 0 <= col < len(g.tile_map[0])):
+            raise ValueError(f'ERR: Field {row, col} is out of bounds! {len(g.tile_map), len(g.tile_map[0])}')
+    agent = getattr(sprites, agent_name)(start[0], start[1], f'{agent_name}.png')
+    path = agent.get_agent_path(g.tile_map, goal)
+    return {'path': [list(tile.position()) for tile in path],
+            'cost': sum([tile.cost() for tile in path]),
+            'length': len(path),
+            'stats': agent.stats,
+            'solve_ms': round((time.perf_counter() - begin) * 1000, 3)}
+
+
+class PathRequestHandler(BaseHTTPRequestHandler):
+    # set by serve()
+    executor = None
+    known_map_ids = set()
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/maps':
+            self.send_json(200, {'maps': sorted(self.known_map_ids)})
+        else:
+            self.send_json(404, {'error': f'Unknown resource {self.path}'})
+
+    def do_POST(self):
+        begin = time.perf_counter()
+        if self.path != '/path':
+            self.send_json(404, {'error': f'Unknown resource {self.path}'})
+            return
+        try:
+            query = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            map_id = query['map_id']
+            agent_name = query['agent']
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {'error': f'Invalid query: {e}'})
+            return
+        # a list or a dict would not hash in the lookups below
+        for name, value in (('map_id', map_id), ('agent', agent_name)):
+            if not isinstance(value, str):
+                self.send_json(400, {'error': f'Invalid {name} {json.dumps(value)}, expected a string'})
+                return
+        if map_id not in self.known_map_ids:
+            self.send_json(404, {'error': f'Unknown map {map_id}'})
+            return
+        if agent_name not in AGENTS:
+            self.send_json(400, {'error': f'Unknown agent {agent_name}'})
+            return
+        for name in ('start', 'goal'):
+            field = query.get(name)
+            # JSON true and false would pass for ints
+            if field is not None and not (isinstance(field, list) and len(field) == 2 and
+                                          all([type(value) is int for value in field])):
+                self.send_json(400, {'error': f'Invalid {name} {json.dumps(field)}, expected [row, col]'})
+                return
+        if not isinstance(query.get('cost_profile', ''), (str, type(None))):
+            self.send_json(400, {'error': f"Invalid cost profile {json.dumps(query['cost_profile'])}"})
+            return
+        try:
+            result = self.executor.submit(find_path, map_id, agent_name, query.get('start'), query.get('goal'),
+                                          query.get('cost_profile')).result()
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self.send_json(500, {'error': f'{type(e).__name__}: {e}'})
+            return
+        result['latency_ms'] = round((time.perf_counter() - begin) * 1000, 3)
+        self.send_json(200, result)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host, port, workers, preload):
+    """
+    Answer the path queries until interrupted. Maps are loaded once per worker process (all of them at the start
+        with preload) and kept in memory.
+    """
+    known_map_ids = map_ids()
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(known_map_ids if preload else [],)) as executor:
+        PathRequestHandler.executor = executor
+        PathRequestHandler.known_map_ids = set(known_map_ids)
+        with ThreadingHTTPServer((host, port), PathRequestHandler) as server:
+            print(f'Serving paths on http://{host}:{port}/path')
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Answer path queries over HTTP, keeping the maps in memory.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT, help='port to listen on')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: CPU count)')
+    parser.add_argument('--no-preload', action='store_true', help='load the maps on their first query')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, not args.no_preload)
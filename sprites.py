@@ -1,9 +1,11 @@
+import time
 from abc import abstractmethod
 
 import pygame
-import os
 import config
-import numpy as np
+from atlas import load_atlas
+from profiles import cost_grid, min_cost, terrain_costs
+from search import NoPathFound, SearchBudgetExceeded, memory_bounded_search, weighted_a_star
 
 
 class BaseSprite(pygame.sprite.Sprite):
@@ -11,12 +13,10 @@ class BaseSprite(pygame.sprite.Sprite):
 
     def __init__(self, row, col, file_name, transparent_color=None):
         pygame.sprite.Sprite.__init__(self)
-        if file_name in BaseSprite.images:
-            self.image = BaseSprite.images[file_name]
-        else:
-            self.image = pygame.image.load(os.path.join(config.IMG_FOLDER, file_name)).convert()
-            self.image = pygame.transform.scale(self.image, (config.TILE_SIZE, config.TILE_SIZE))
-            BaseSprite.images[file_name] = self.image
+        # images come from the atlas of the tile size, so games with different map sizes can share the cache
+        if config.TILE_SIZE not in BaseSprite.images:
+            BaseSprite.images[config.TILE_SIZE] = load_atlas(config.TILE_SIZE)
+        self.image = BaseSprite.images[config.TILE_SIZE][file_name]
         # making the image transparent (if needed)
         if transparent_color:
             self.image.set_colorkey(transparent_color)
@@ -34,7 +34,8 @@ class Tile(BaseSprite):
         return self.row, self.col
 
     def cost(self):
-        pass
+        # looked up in the active cost profile, so switching the profile doesn't require new tiles
+        return terrain_costs()[self.kind()]
 
     def kind(self):
         pass
@@ -47,9 +48,6 @@ class Stone(Tile):
     def __init__(self, row, col):
         super().__init__(row, col, 'stone.png')
 
-    def cost(self):
-        return 1000
-
     def kind(self):
         return 's'
 
@@ -61,9 +59,6 @@ class Water(Tile):
     def __init__(self, row, col):
         super().__init__(row, col, 'water.png')
 
-    def cost(self):
-        return 500
-
     def kind(self):
         return 'w'
 
@@ -75,9 +70,6 @@ class Road(Tile):
     def __init__(self, row, col):
         super().__init__(row, col, 'road.png')
 
-    def cost(self):
-        return 2
-
     def kind(self):
         return 'r'
 
@@ -89,9 +81,6 @@ class Grass(Tile):
     def __init__(self, row, col):
         super().__init__(row, col, 'grass.png')
 
-    def cost(self):
-        return 3
-
     def kind(self):
         return 'g'
 
@@ -103,9 +92,6 @@ class Mud(Tile):
     def __init__(self, row, col):
         super().__init__(row, col, 'mud.png')
 
-    def cost(self):
-        return 5
-
     def kind(self):
         return 'm'
 
@@ -117,11 +103,8 @@ class Dune(Tile):
     def __init__(self, row, col):
         super().__init__(row, col, 'dune.png')
 
-    def cost(self):
-        return 7
-
     def kind(self):
-        return 's'
+        return 'd'
 
     def __str__(self) -> str:
         return "Dune [" + str(self.cost()) + "] (" + str(self.row) + "," + str(self.col) + ")"
@@ -133,25 +116,41 @@ class Goal(BaseSprite):
 
 
 class Trail(BaseSprite):
+    # one trail per field, with the numbers of all the steps to it
     def __init__(self, row, col, num):
         super().__init__(row, col, 'trail.png', config.DARK_GREEN)
-        self.num = num
+        self.nums = [num]
+
+    def add_step(self, num):
+        self.nums.append(num)
 
     def draw(self, screen):
-        text = config.GAME_FONT.render(f'{self.num}', True, config.WHITE)
-        text_rect = text.get_rect(center=self.rect.center)
-        screen.blit(text, text_rect)
+        # comma separated numbers, on as many lines as they need to fit in the tile
+        lines = [f'{self.nums[0]}']
+        for num in self.nums[1:]:
+            line = f'{lines[-1]},{num}'
+            if config.GAME_FONT.size(line)[0] > self.rect.width:
+                lines.append(f'{num}')
+            else:
+                lines[-1] = line
+        line_height = config.GAME_FONT.get_linesize()
+        top = self.rect.centery - line_height * len(lines) // 2
+        for i, line in enumerate(lines):
+            text = config.GAME_FONT.render(line, True, config.WHITE)
+            text_rect = text.get_rect(centerx=self.rect.centerx, top=top + i * line_height)
+            screen.blit(text, text_rect)
 
 
 class Agent(BaseSprite):
     def __init__(self, row, col, file_name):
         super(Agent, self).__init__(row, col, file_name, config.DARK_GREEN)
+        # statistics of the last search, reported by the game
+        self.stats = dict()
 
-    def move_towards(self, row, col):
-        row = row - self.row
-        col = col - self.col
-        self.rect.x += col
-        self.rect.y += row
+    def move_towards(self, row, col, progress):
+        # progress is the part of the step from (self.row, self.col) to (row, col) that is done, between 0 and 1
+        self.rect.x = round((self.col + (col - self.col) * progress) * config.TILE_SIZE)
+        self.rect.y = round((self.row + (row - self.row) * progress) * config.TILE_SIZE)
 
     def place_to(self, row, col):
         self.row = row
@@ -159,6 +158,16 @@ class Agent(BaseSprite):
         self.rect.x = col * config.TILE_SIZE
         self.rect.y = row * config.TILE_SIZE
 
+    def get_checkpointer(self, game_map, goal, variant=''):
+        # checkpoints of the search to the goal, does nothing unless CHECKPOINT_FOLDER is set; searches of the
+        # same agent that explore differently (variant) don't share the checkpoints
+        from checkpoint import Checkpointer, search_fingerprint
+
+        if config.CHECKPOINT_FOLDER is None:
+            return Checkpointer()
+        return Checkpointer(config.CHECKPOINT_FOLDER, search_fingerprint(type(self).__name__ + variant, game_map,
+                                                                         (self.row, self.col), goal))
+
     @abstractmethod
     def __get_path_to_root(self, start_row: int, start_col: int,
                            current_father_son_relations: list, index_of_father: int) -> list:
@@ -325,31 +334,96 @@ class Aki(Agent):
         for neighbour in neighbours:
             list_for_expanding.append((neighbour[0], neighbour[1], father_index))
 
-    def get_agent_path(self, game_map, goal):
-
-        row = self.row
-        col = self.col
+    def __get_partial_stats(self, goal, father_son_relations, list_for_expanding, expansions, pruned, duration):
 
-        list_for_expanding = [(row, col, -1)]
-        father_son_relations = [(row, col, -1)]
+        # the reached field closest to the goal tells how far the search got
+        closest = min(father_son_relations, key=lambda field: abs(field[0] - goal[0]) + abs(field[1] - goal[1]))
 
-        while True:
+        return {'expansions': expansions, 'pruned': pruned, 'time': round(duration, 3),
+                'frontier': len(list_for_expanding),
+                'reached_fields': len(set([field[:2] for field in father_son_relations])),
+                'closest_field': closest[:2], 'closest_distance': abs(closest[0] - goal[0]) + abs(closest[1] - goal[1])}
 
-            # node expanding
-            row, col, index_of_father = list_for_expanding.pop()
-            index_for_sons = father_son_relations.index((row, col, index_of_father))
+    def get_agent_path(self, game_map, goal):
 
-            neighbours = self.__get_valid_neighbours(game_map, row, col, father_son_relations, index_of_father)
+        row = self.row
+        col = self.col
 
-            self.__add_neighbours_to_father_son_relations(neighbours, father_son_relations, index_for_sons)
+        transposition = config.AKI_TRANSPOSITION
+        expansion_budget = config.AKI_EXPANSION_BUDGET
+        begin = time.perf_counter()
+        deadline = None if config.AKI_TIME_BUDGET is None else begin + config.AKI_TIME_BUDGET
+
+        with self.get_checkpointer(game_map, goal, f'/{transposition}' if transposition else '') as checkpointer:
+            state = checkpointer.load()
+            if state is None:
+                list_for_expanding = [(row, col, -1)]
+                father_son_relations = [(row, col, -1)]
+                # (row, col) -> cheapest cost of the path the field was expanded with
+                transposition_table = dict()
+                # index in father_son_relations -> cost of the path to the expanded field
+                expanded_costs = dict()
+                expansions = 0
+                pruned = 0
+            else:
+                list_for_expanding = state['list_for_expanding']
+                father_son_relations = state['father_son_relations']
+                transposition_table = {(row, col): cost for row, col, cost in state['transposition_table']}
+                expanded_costs = dict(state['expanded_costs'])
+                expansions, pruned = state['counters'][0]
+
+            while True:
+
+                if checkpointer.due():
+                    checkpointer.save({'list_for_expanding': list_for_expanding,
+                                       'father_son_relations': father_son_relations,
+                                       'transposition_table': [(row, col, cost) for (row, col), cost
+                                                               in transposition_table.items()],
+                                       'expanded_costs': list(expanded_costs.items()),
+                                       'counters': [(expansions, pruned)]})
+
+                if not list_for_expanding:
+                    raise NoPathFound(f'ERR: There is no path from {self.row, self.col} to {goal}!')
+
+                if (expansion_budget is not None and expansions >= expansion_budget) or \
+                        (deadline is not None and time.perf_counter() >= deadline):
+                    self.stats = self.__get_partial_stats(goal, father_son_relations, list_for_expanding, expansions,
+                                                          pruned, time.perf_counter() - begin)
+                    raise SearchBudgetExceeded(f'ERR: Aki ran out of the budget after {expansions} expansions!',
+                                               self.stats)
+
+                # node expanding
+                row, col, index_of_father = list_for_expanding.pop()
+
+                # the fields are still taken in the same order, only the ones reached before are skipped
+                if transposition is not None:
+                    cost = expanded_costs.get(index_of_father, 0) + game_map[row][col].cost()
+                    if (row, col) in transposition_table and \
+                            (transposition == 'visited' or transposition_table[(row, col)] <= cost):
+                        pruned += 1
+                        continue
+                    transposition_table[(row, col)] = cost
+
+                index_for_sons = father_son_relations.index((row, col, index_of_father))
+                expansions += 1
+                if transposition is not None:
+                    expanded_costs[index_for_sons] = cost
+
+                neighbours = self.__get_valid_neighbours(game_map, row, col, father_son_relations, index_of_father)
+
+                self.__add_neighbours_to_father_son_relations(neighbours, father_son_relations, index_for_sons)
+
+                self.__insert_neighbours_in_appropriate_order(neighbours, list_for_expanding, index_for_sons)
+
+                if (row, col) == goal:
+                    final_row = row
+                    final_col = col
+                    final_index_of_father = index_of_father
+                    break
 
-            self.__insert_neighbours_in_appropriate_order(neighbours, list_for_expanding, index_for_sons)
-
-            if (row, col) == goal:
-                final_row = row
-                final_col = col
-                final_index_of_father = index_of_father
-                break
+        self.stats = {'expansions': expansions}
+        if transposition is not None:
+            self.stats['pruned'] = pruned
 
         path_tuples = self.__get_path_to_root(final_row, final_col, father_son_relations, final_index_of_father)
         path_tuples.reverse()
@@ -526,7 +600,6 @@ class Jocke(Agent):
             row, col, index_of_father = list_for_expanding.pop(0)
             index_for_sons = father_son_relations.index((row, col, index_of_father))
             expanded_nodes.append((row, col))
-            print(row, col)
 
             # remove potentially same nodes with bigger cost
             list_for_expanding = self.__remove_more_expensive_fields(row, col, list_for_expanding)
@@ -553,6 +626,8 @@ class Jocke(Agent):
             if (final_row, final_col) != (-1, -1):
                 break
 
+        self.stats = {'expansions': len(expanded_nodes)}
+
         path_tuples = self.__get_path_to_root(final_row, final_col, father_son_relations, final_index_of_father)
         path_tuples.reverse()
 
@@ -653,37 +728,65 @@ class Draza(Agent):
         new_list_for_expanding = [field for field in list_for_expanding if field[0] != row or field[1] != col]
         return new_list_for_expanding
 
+    def __get_memory_bounded_path(self, game_map, goal):
+
+        path_tuples, self.stats = memory_bounded_search(cost_grid(game_map), (self.row, self.col), tuple(goal), 0,
+                                                        config.MEMORY_LIMIT)
+
+        return [game_map[row_col[0]][row_col[1]] for row_col in path_tuples]
+
     def get_agent_path(self, game_map, goal):
 
+        if config.MEMORY_LIMIT is not None:
+            return self.__get_memory_bounded_path(game_map, goal)
+
         row = self.row
         col = self.col
 
-        list_for_expanding = [(row, col, 0, 0, 0, -1)]
-        father_son_relations = [(row, col, -1)]
-        expanded_nodes = []
+        with self.get_checkpointer(game_map, goal) as checkpointer:
+            state = checkpointer.load()
+            if state is None:
+                list_for_expanding = [(row, col, 0, 0, 0, -1)]
+                father_son_relations = [(row, col, -1)]
+                expanded_nodes = []
+                expansions = 0
+            else:
+                list_for_expanding = state['list_for_expanding']
+                father_son_relations = state['father_son_relations']
+                expanded_nodes = state['expanded_nodes']
+                expansions = state['counters'][0][0]
 
-        while True:
+            while True:
 
-            # node expanding
-            row, col, cost, depth, direction, index_of_father = list_for_expanding.pop(0)
-            index_for_sons = father_son_relations.index((row, col, index_of_father))
-            expanded_nodes.append((row, col))
+                if checkpointer.due():
+                    checkpointer.save({'list_for_expanding': list_for_expanding,
+                                       'father_son_relations': father_son_relations,
+                                       'expanded_nodes': expanded_nodes,
+                                       'counters': [(expansions,)]})
 
-            # remove potentially same nodes with bigger cost
-            list_for_expanding = self.__remove_more_expensive_fields(row, col, list_for_expanding)
+                # node expanding
+                row, col, cost, depth, direction, index_of_father = list_for_expanding.pop(0)
+                index_for_sons = father_son_relations.index((row, col, index_of_father))
+                expanded_nodes.append((row, col))
+                expansions += 1
 
-            neighbours = self.__get_valid_neighbours(game_map, row, col, cost, father_son_relations, index_of_father,
-                                                     expanded_nodes)
+                # remove potentially same nodes with bigger cost
+                list_for_expanding = self.__remove_more_expensive_fields(row, col, list_for_expanding)
 
-            self.__add_neighbours_to_father_son_relations(neighbours, father_son_relations, index_for_sons)
+                neighbours = self.__get_valid_neighbours(game_map, row, col, cost, father_son_relations,
+                                                         index_of_father, expanded_nodes)
 
-            self.__insert_neighbours_in_appropriate_order(neighbours, list_for_expanding, index_for_sons)
+                self.__add_neighbours_to_father_son_relations(neighbours, father_son_relations, index_for_sons)
 
-            if (row, col) == goal:
-                final_row = row
-                final_col = col
-                final_index_of_father = index_of_father
-                break
+                self.__insert_neighbours_in_appropriate_order(neighbours, list_for_expanding, index_for_sons)
+
+                if (row, col) == goal:
+                    final_row = row
+                    final_col = col
+                    final_index_of_father = index_of_father
+                    break
+
+        self.stats = {'expansions': expansions}
 
         path_tuples = self.__get_path_to_root(final_row, final_col, father_son_relations, final_index_of_father)
         path_tuples.reverse()
@@ -717,10 +820,10 @@ class Bole(Agent):
         return path_to_root
 
     def __calculate_manhattan_distance_to_goal(self, current_row, current_col, goal_row, goal_col):
-        return np.abs(current_row - goal_row) + np.abs(current_col - goal_col)
+        return abs(current_row - goal_row) + abs(current_col - goal_col)
 
     def __calculate_manhattan_cost_to_goal(self, current_row, current_col, goal_row, goal_col):
-        road_cost = 2
+        road_cost = min_cost()
         return self.__calculate_manhattan_distance_to_goal(current_row, current_col, goal_row, goal_col) * road_cost
 
     def __get_valid_neighbours(self, game_map, current_row, current_col, current_cost, current_father_son_relations,
@@ -801,7 +904,28 @@ class Bole(Agent):
         new_list_for_expanding = [field for field in list_for_expanding if field[0] != row or field[1] != col]
         return new_list_for_expanding
 
+    def __get_memory_bounded_path(self, game_map, goal):
+
+        road_cost = min_cost()
+        path_tuples, self.stats = memory_bounded_search(cost_grid(game_map), (self.row, self.col), tuple(goal),
+                                                        road_cost, config.MEMORY_LIMIT)
+
+        return [game_map[row_col[0]][row_col[1]] for row_col in path_tuples]
+
+    def __get_bounded_suboptimal_path(self, game_map, goal):
+
+        road_cost = min_cost()
+        path_tuples, self.stats = weighted_a_star(cost_grid(game_map), (self.row, self.col), tuple(goal), road_cost,
+                                                  config.EPSILON)
+
+        return [game_map[row_col[0]][row_col[1]] for row_col in path_tuples]
+
     def get_agent_path(self, game_map, goal):
+        if config.MEMORY_LIMIT is not None:
+            return self.__get_memory_bounded_path(game_map, goal)
+        if config.EPSILON is not None:
+            return self.__get_bounded_suboptimal_path(game_map, goal)
+
         row = self.row
         col = self.col
         goal_row, goal_col = goal
@@ -841,6 +965,8 @@ class Bole(Agent):
                 final_index_of_father = index_of_father
                 break
 
+        self.stats = {'expansions': len(expanded_nodes)}
+
         path_tuples = self.__get_path_to_root(final_row, final_col, father_son_relations, final_index_of_father)
         path_tuples.reverse()
 
@@ -0,0 +1,29 @@
+import random
+
+# share of each field kind on the generated maps
+TERRAIN_WEIGHTS = {'r': 30, 'g': 30, 'm': 15, 'd': 15, 'w': 7, 's': 3}
+
+
+def generate_map(rows: int, cols: int, seed: int) -> tuple:
+    """
+    Generate a random map, the same one for the same size and seed.
+
+    :return: Tuple (char_map, start, goal) - map as a list of rows of field kinds, and the (row, col) of the start
+        and the goal field in its opposite corners
+    :param rows: number of rows
+    :param cols: number of columns
+    :param seed: seed of the random generator
+    """
+    generator = random.Random(seed)
+    kinds = list(TERRAIN_WEIGHTS)
+    weights = list(TERRAIN_WEIGHTS.values())
+    char_map = [generator.choices(kinds, weights, k=cols) for _ in range(rows)]
+    return char_map, (0, 0), (rows - 1, cols - 1)
+
+
+def save_map(map_name: str, char_map: list, start: tuple, goal: tuple):
+    with open(map_name, 'w') as f:
+        f.write(f'{start[0]},{start[1]}\n')
+        f.write(f'{goal[0]},{goal[1]}\n')
+        for row in char_map:
+            f.write(''.join(row) + '\n')